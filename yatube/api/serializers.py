@@ -0,0 +1,127 @@
+"""Поля ресурсов API.
+
+Поле знает, какие колонки и связи ему нужны, поэтому ?fields= сужает
+не только ответ, но и SQL: в запрос попадают только нужные колонки
+(only) и только нужные JOIN (select_related).
+"""
+from django.core.exceptions import ObjectDoesNotExist
+
+
+class ApiError(ValueError):
+    """Ошибка в параметрах запроса: ответ 400 с текстом ошибки."""
+
+
+def _follow(path, obj):
+    for name in path.split('__'):
+        if obj is None:
+            return None
+        obj = getattr(obj, name)
+    return obj
+
+
+def _file_url(value):
+    return value.url if value else None
+
+
+class Field:
+    def __init__(self, path=None, *, related=None, columns=None,
+                 source=None):
+        self.columns = columns or (path,)
+        self.related = related
+        self.path = path
+        self.source = source
+
+    def value(self, obj):
+        if self.source is not None:
+            return self.source(obj)
+        return _follow(self.path, obj)
+
+
+class Resource:
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def parse_fields(self, value):
+        """Список полей из ?fields=a,b; по умолчанию - все."""
+        if not value:
+            return list(self.fields)
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(
+                f'Неизвестные поля: {", ".join(unknown)}. '
+                f'Доступны: {", ".join(self.fields)}.'
+            )
+        return names
+
+    def prepare(self, queryset, names, extra=()):
+        fields = [self.fields[name] for name in names]
+        related = {field.related for field in fields if field.related}
+        columns = {'pk', *extra, *related}
+        for field in fields:
+            columns.update(field.columns)
+        if related:
+            # select_related() без аргументов подтянул бы все связи.
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+    def serialize(self, obj, names):
+        return {name: self.fields[name].value(obj) for name in names}
+
+
+def _posts_count(user):
+    try:
+        return user.profile.posts_count
+    except ObjectDoesNotExist:
+        return 0
+
+
+POST = Resource(
+    id=Field('id'),
+    text=Field('text'),
+    pub_date=Field('pub_date'),
+    author=Field('author__username', related='author'),
+    group=Field('group__slug', related='group'),
+    image=Field(
+        columns=('image',), source=lambda post: _file_url(post.image)
+    ),
+    image_width=Field('image_width'),
+    image_height=Field('image_height'),
+    image_placeholder=Field('image_placeholder'),
+    thumbnail=Field(
+        columns=('thumbnails',),
+        source=lambda post: (post.card_thumbnail or {}).get('url')
+    ),
+    comments_count=Field('comments_count'),
+)
+
+COMMENT = Resource(
+    id=Field('id'),
+    post=Field('post_id', columns=('post',)),
+    author=Field('author__username', related='author'),
+    text=Field('text'),
+    created=Field('created'),
+)
+
+GROUP = Resource(
+    id=Field('id'),
+    slug=Field('slug'),
+    title=Field('title'),
+    description=Field('description'),
+    posts_count=Field('posts_count'),
+    last_post_at=Field('last_post_at'),
+    last_post_preview=Field('last_post_preview'),
+)
+
+PROFILE = Resource(
+    username=Field('username'),
+    full_name=Field(
+        columns=('first_name', 'last_name'),
+        source=lambda user: user.get_full_name()
+    ),
+    posts_count=Field(
+        columns=('profile__posts_count',),
+        related='profile',
+        source=_posts_count
+    ),
+)
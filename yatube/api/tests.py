@@ -0,0 +1,149 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+from posts.tests.mixins import QueryBudgetMixin
+
+POSTS = reverse('api:posts')
+
+
+class ApiTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='test_title',
+            description='test_description',
+            slug='test-slug'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'post {number}', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0], author=cls.author, text='comment'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_list_pages_with_cursors(self):
+        response = self.client.get(POSTS, {'limit': 2})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = response.json()
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [self.posts[4].pk, self.posts[3].pk]
+        )
+        self.assertIsNone(data['previous'])
+        data = self.client.get(
+            POSTS, {'limit': 2, 'after': data['next']}
+        ).json()
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [self.posts[2].pk, self.posts[1].pk]
+        )
+        self.assertIsNotNone(data['previous'])
+
+    def test_post_detail(self):
+        response = self.client.get(
+            reverse('api:post', kwargs={'post_id': self.posts[0].pk})
+        )
+        self.assertEqual(response.json(), {
+            'id': self.posts[0].pk,
+            'text': 'post 0',
+            'pub_date': response.json()['pub_date'],
+            'author': 'author',
+            'group': 'test-slug',
+            'image': None,
+            'image_width': None,
+            'image_height': None,
+            'image_placeholder': '',
+            'thumbnail': None,
+            'comments_count': 1,
+        })
+        self.assertNotIn(b': ', response.content)
+
+    def test_sparse_fields_narrow_query(self):
+        # Версия области кэша и сами посты.
+        with self.assertNumQueries(2) as context:
+            data = self.client.get(POSTS, {'fields': 'id,text'}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        sql = context.captured_queries[1]['sql']
+        self.assertNotIn('auth_user', sql)
+        self.assertNotIn('"comments_count"', sql)
+
+    def test_unknown_field(self):
+        response = self.client.get(POSTS, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_bulk_lookup_keeps_order(self):
+        ids = [self.posts[1].pk, 10 ** 6, self.posts[3].pk]
+        with self.assertQueryBudget(2):
+            data = self.client.get(
+                POSTS, {'ids': ','.join(map(str, ids)), 'fields': 'id'}
+            ).json()
+        self.assertEqual(
+            data['results'],
+            [{'id': self.posts[1].pk}, {'id': self.posts[3].pk}]
+        )
+        response = self.client.get(POSTS, {'ids': '1,x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_related_resources(self):
+        addresses = {
+            reverse('api:post_comments', kwargs={
+                'post_id': self.posts[0].pk
+            }): ('results', 0, 'text', 'comment'),
+            reverse('api:groups'): ('results', 0, 'posts_count', 5),
+            reverse('api:group', kwargs={'slug': 'test-slug'}):
+                ('last_post_preview', 'post 4'),
+            reverse('api:group_posts', kwargs={'slug': 'test-slug'}):
+                ('results', 0, 'text', 'post 4'),
+            reverse('api:profile', kwargs={'username': 'author'}):
+                ('full_name', 'Лев Толстой'),
+            reverse('api:profile_posts', kwargs={'username': 'author'}):
+                ('results', 4, 'text', 'post 0'),
+        }
+        for address, (*path, expected) in addresses.items():
+            with self.subTest(address=address):
+                value = self.client.get(address).json()
+                for key in path:
+                    value = value[key]
+                self.assertEqual(value, expected)
+
+    def test_missing_objects_return_json_404(self):
+        for address in (
+            reverse('api:post', kwargs={'post_id': 10 ** 6}),
+            reverse('api:post_comments', kwargs={'post_id': 10 ** 6}),
+            reverse('api:group_posts', kwargs={'slug': 'missing'}),
+            reverse('api:profile', kwargs={'username': 'missing'}),
+        ):
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('error', response.json())
+
+    def test_conditional_requests(self):
+        address = reverse('api:post', kwargs={'post_id': self.posts[0].pk})
+        etag = self.client.get(address)['ETag']
+        # Только версия области кэша.
+        with self.assertNumQueries(1):
+            response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.posts[0], author=self.author, text='another'
+        )
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['comments_count'], 2)
+
+    def test_read_only(self):
+        response = self.client.post(POSTS)
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,154 @@
+"""JSON API только для чтения: /api/v1/.
+
+Списки листаются курсорами (?after=, ?before=, ?limit=), как ленты
+сайта. ?fields=a,b оставляет в ответе и в SQL только нужные поля,
+?ids=1,2,3 отдаёт несколько объектов одним запросом в порядке ids.
+Ответы поддерживают ETag/Last-Modified по тем же областям кэша, что
+и HTML-страницы.
+"""
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from posts.cache import (
+    GROUPS_SCOPE, INDEX_SCOPE, conditional_page, group_scope, post_scope,
+    profile_scope
+)
+from posts.models import Comment, Group, Post, User
+from posts.utils import KeysetPaginator
+from .serializers import COMMENT, GROUP, POST, PROFILE, ApiError
+
+PAGE_LIMIT = 20
+MAX_LIMIT = 100
+MAX_IDS = 100
+
+COMPACT_JSON = {'separators': (',', ':'), 'ensure_ascii': False}
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        encoder=DjangoJSONEncoder,
+        json_dumps_params=COMPACT_JSON
+    )
+
+
+def api_view(scopes_func):
+    """GET-эндпоинт API: ошибки в JSON и условные запросы."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                return json_response(view(request, *args, **kwargs))
+            except Http404:
+                return json_response({'error': 'Не найдено'}, status=404)
+            except ApiError as error:
+                return json_response({'error': str(error)}, status=400)
+        return require_safe(conditional_page(scopes_func)(wrapper))
+    return decorator
+
+
+def _int_param(request, name, default, maximum):
+    value = request.GET.get(name)
+    if value is None:
+        return default
+    if not value.isdigit() or not 0 < int(value) <= maximum:
+        raise ApiError(f'{name} должен быть числом от 1 до {maximum}.')
+    return int(value)
+
+
+def _ids_param(value):
+    try:
+        ids = [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise ApiError('ids должен быть списком чисел через запятую.')
+    if len(ids) > MAX_IDS:
+        raise ApiError(f'Не больше {MAX_IDS} ids за запрос.')
+    return ids
+
+
+def detail(request, resource, queryset, **lookup):
+    names = resource.parse_fields(request.GET.get('fields'))
+    obj = get_object_or_404(resource.prepare(queryset, names), **lookup)
+    return resource.serialize(obj, names)
+
+
+def listing(request, resource, queryset, field='pub_date', descending=True):
+    names = resource.parse_fields(request.GET.get('fields'))
+    if request.GET.get('ids'):
+        ids = _ids_param(request.GET['ids'])
+        found = {
+            obj.pk: obj for obj in
+            resource.prepare(queryset.filter(pk__in=ids), names)
+        }
+        return {'results': [
+            resource.serialize(found[pk], names) for pk in ids if pk in found
+        ]}
+    paginator = KeysetPaginator(
+        resource.prepare(queryset, names, extra=(field,)),
+        per_page=_int_param(request, 'limit', PAGE_LIMIT, MAX_LIMIT),
+        field=field,
+        descending=descending
+    )
+    page = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return {
+        'results': [resource.serialize(obj, names) for obj in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+@api_view(lambda: [INDEX_SCOPE])
+def post_list(request):
+    return listing(request, POST, Post.objects.all())
+
+
+@api_view(lambda post_id: [post_scope(post_id)])
+def post_detail(request, post_id):
+    return detail(request, POST, Post.objects.all(), pk=post_id)
+
+
+@api_view(lambda post_id: [post_scope(post_id)])
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    return listing(
+        request, COMMENT, Comment.objects.filter(post_id=post_id),
+        field='created'
+    )
+
+
+@api_view(lambda: [GROUPS_SCOPE])
+def group_list(request):
+    return listing(
+        request, GROUP, Group.objects.all(), field='title', descending=False
+    )
+
+
+@api_view(lambda slug: [group_scope(slug)])
+def group_detail(request, slug):
+    return detail(request, GROUP, Group.objects.all(), slug=slug)
+
+
+@api_view(lambda slug: [group_scope(slug)])
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    return listing(request, POST, Post.objects.filter(group=group))
+
+
+@api_view(lambda username: [profile_scope(username)])
+def profile_detail(request, username):
+    return detail(request, PROFILE, User.objects.all(), username=username)
+
+
+@api_view(lambda username: [profile_scope(username)])
+def profile_posts(request, username):
+    user = get_object_or_404(User.objects.only('pk'), username=username)
+    return listing(request, POST, Post.objects.filter(author=user))
@@ -0,0 +1,42 @@
+"""SQLite для нескольких процессов-воркеров.
+
+Отличия от django.db.backends.sqlite3:
+
+* при открытии соединения включаются WAL (читатели не ждут писателя),
+  synchronous=NORMAL (в WAL безопасно при сбое процесса, fsync только
+  на checkpoint), mmap и busy_timeout. Значения переопределяются в
+  DATABASES[...]['OPTIONS']['pragmas'];
+* транзакции начинаются с BEGIN IMMEDIATE. При обычном BEGIN транзакция,
+  которая сначала читает, а потом пишет, получает "database is locked"
+  сразу, не дожидаясь busy_timeout: SQLite не может повысить блокировку,
+  пока пишет другой. IMMEDIATE берёт блокировку записи в начале
+  и ждёт её по busy_timeout.
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = {
+            **PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})
+        }
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
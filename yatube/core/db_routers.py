@@ -0,0 +1,106 @@
+"""Маршрутизация запросов к БД: запись - в основную, чтение - в реплики.
+
+Реплики перечислены в settings.DATABASE_REPLICAS. Читать из них можно
+только внутри веб-запроса (их включает ReplicaRoutingMiddleware): команды
+и воркер очереди читают и пишут одну и ту же основную БД, иначе
+пересчёт по отстающей реплике записал бы в основную старые данные.
+
+После записи пользователь какое-то время читает из основной БД, чтобы
+видеть свои изменения: до конца запроса - по флагу в потоке, в следующих
+запросах - по cookie, которую ставит middleware.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'use_primary'
+
+# Эти таблицы всегда читаются из основной БД: отставание сессий
+# разлогинивало бы пользователя, отставание очереди - дублировало задачи,
+# а по старой версии области кэша отдавались бы устаревшие страницы.
+PRIMARY_ONLY = {'sessions.session', 'core.job', 'posts.cachescope'}
+
+_state = threading.local()
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def replica_lag():
+    """Сколько секунд после записи читать из основной БД."""
+    return getattr(settings, 'REPLICA_LAG_SECONDS', 5)
+
+
+@contextmanager
+def allow_replica_reads(pinned=False):
+    previous = getattr(_state, 'replicas_allowed', False), _pinned()
+    _state.replicas_allowed, _state.pinned = True, pinned
+    _state.wrote = False
+    try:
+        yield _state
+    finally:
+        _state.replicas_allowed, _state.pinned = previous
+
+
+@contextmanager
+def use_primary():
+    """Все чтения внутри блока идут в основную БД."""
+    previous = _pinned()
+    _state.pinned = True
+    try:
+        yield
+    finally:
+        _state.pinned = previous
+
+
+def use_primary_after(timestamp):
+    """use_primary(), если с момента timestamp реплика могла не догнать."""
+    if time.time() - timestamp < replica_lag():
+        return use_primary()
+    return _no_pin()
+
+
+@contextmanager
+def _no_pin():
+    yield
+
+
+def _pinned():
+    return getattr(_state, 'pinned', False)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        aliases = replicas()
+        if (
+            not aliases
+            or not getattr(_state, 'replicas_allowed', False)
+            or _pinned()
+            or model._meta.label_lower in PRIMARY_ONLY
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        if getattr(_state, 'replicas_allowed', False):
+            _state.wrote = _state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными из основной БД.
+        return db not in replicas()
@@ -0,0 +1,106 @@
+"""Простая фоновая очередь задач с хранением в БД.
+
+Обработчик регистрируется декоратором и получает список payload'ов:
+воркер собирает готовые задачи одного вида в пачку.
+
+    @job('posts.reindex')
+    def reindex(payloads):
+        ...
+
+    enqueue('posts.reindex', post_id=post.pk)
+
+Задача пишется в ту же транзакцию, что и вызвавшее её изменение, поэтому
+не теряется при падении процесса и не выполняется при откате. При
+JOBS_SYNC = True (тесты, локальная отладка) обработчик вызывается сразу.
+"""
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BATCH_SIZE = 100
+# Задачи, захваченные упавшим воркером, возвращаются в очередь.
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+_handlers = {}
+
+
+def job(kind):
+    def decorator(handler):
+        _handlers[kind] = handler
+        return handler
+    return decorator
+
+
+def enqueue(kind, **payload):
+    if kind not in _handlers:
+        raise KeyError(f'Неизвестный вид задачи: {kind}')
+    if getattr(settings, 'JOBS_SYNC', False):
+        _handlers[kind]([payload])
+        return None
+    return Job.objects.create(kind=kind, payload=json.dumps(payload))
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=2 ** attempts)
+
+
+def _claim(batch_size, now):
+    worker = uuid.uuid4().hex
+    Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=now - LOCK_TIMEOUT
+    ).update(status=Job.PENDING, locked_by='')
+    ready = Job.objects.filter(
+        status=Job.PENDING, run_at__lte=now
+    ).values_list('pk', flat=True)[:batch_size]
+    Job.objects.filter(pk__in=list(ready), status=Job.PENDING).update(
+        status=Job.RUNNING, locked_by=worker, locked_at=now
+    )
+    return list(Job.objects.filter(locked_by=worker, status=Job.RUNNING))
+
+
+def _run_batch(kind, jobs, now):
+    handler = _handlers.get(kind)
+    try:
+        if handler is None:
+            raise KeyError(f'Неизвестный вид задачи: {kind}')
+        with transaction.atomic():
+            handler([json.loads(item.payload) for item in jobs])
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Задачи %s завершились ошибкой', kind)
+        for item in jobs:
+            item.attempts += 1
+            item.last_error = error
+            item.locked_by = ''
+            if item.attempts >= MAX_ATTEMPTS:
+                item.status = Job.FAILED
+            else:
+                item.status = Job.PENDING
+                item.run_at = now + retry_delay(item.attempts)
+        Job.objects.bulk_update(
+            jobs, ('attempts', 'last_error', 'locked_by', 'status', 'run_at')
+        )
+        return
+    Job.objects.filter(pk__in=[item.pk for item in jobs]).delete()
+
+
+def run_pending(batch_size=BATCH_SIZE):
+    """Выполняет готовые задачи пачками по видам, возвращает их число."""
+    now = timezone.now()
+    batches = {}
+    for item in _claim(batch_size, now):
+        batches.setdefault(item.kind, []).append(item)
+    for kind, jobs in batches.items():
+        _run_batch(kind, jobs, now)
+    return sum(len(jobs) for jobs in batches.values())
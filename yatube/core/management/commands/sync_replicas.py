@@ -0,0 +1,44 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.db_routers import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в файлы реплик из DATABASE_REPLICAS. '
+        'Заменяет репликацию при локальной проверке маршрутизации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Основная база, с которой снимается копия.'
+        )
+
+    def handle(self, *args, **options):
+        source_path = connections[options['database']].settings_dict['NAME']
+        aliases = replicas()
+        if not aliases:
+            raise CommandError('DATABASE_REPLICAS пуст.')
+        source = sqlite3.connect(source_path)
+        try:
+            for alias in aliases:
+                database = connections[alias].settings_dict
+                if not database['ENGINE'].endswith('sqlite3'):
+                    raise CommandError(
+                        f'{alias}: поддерживается только SQLite.'
+                    )
+                connections[alias].close()
+                # backup() даёт согласованный снимок даже во время записи.
+                target = sqlite3.connect(database['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: {database["NAME"]}')
+        finally:
+            source.close()
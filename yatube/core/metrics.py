@@ -0,0 +1,122 @@
+"""Гистограммы задержек в памяти процесса и вывод в формате Prometheus.
+
+Каждый процесс (воркер gunicorn) копит свои значения; Prometheus
+собирает их с каждого воркера и суммирует сам.
+"""
+import bisect
+import threading
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"')
+        )
+        for name, value in pairs
+    )
+    return '{' + body + '}'
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(
+                key, {'buckets': [0] * len(self.buckets), 'sum': 0.0,
+                      'count': 0}
+            )
+            if index < len(self.buckets):
+                series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self._lock:
+            series = {
+                key: {**value, 'buckets': list(value['buckets'])}
+                for key, value in self._series.items()
+            }
+        for labels, value in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, value['buckets']):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket'
+                    f'{_format_labels(labels, le=bound)} {cumulative}'
+                )
+            lines.append(
+                f'{self.name}_bucket{_format_labels(labels, le="+Inf")} '
+                f'{value["count"]}'
+            )
+            lines.append(
+                f'{self.name}_sum{_format_labels(labels)} {value["sum"]}'
+            )
+            lines.append(
+                f'{self.name}_count{_format_labels(labels)} {value["count"]}'
+            )
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = []
+
+    def histogram(self, *args, **kwargs):
+        histogram = Histogram(*args, **kwargs)
+        self.histograms.append(histogram)
+        return histogram
+
+    def clear(self):
+        for histogram in self.histograms:
+            histogram.clear()
+
+    def render(self):
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+REQUEST_DURATION = REGISTRY.histogram(
+    'yatube_request_duration_seconds',
+    'Полное время обработки запроса.'
+)
+DB_QUERIES = REGISTRY.histogram(
+    'yatube_db_queries',
+    'Число SQL-запросов на один HTTP-запрос.',
+    buckets=QUERY_COUNT_BUCKETS
+)
+DB_DURATION = REGISTRY.histogram(
+    'yatube_db_duration_seconds',
+    'Суммарное время SQL-запросов за HTTP-запрос.'
+)
+TEMPLATE_DURATION = REGISTRY.histogram(
+    'yatube_template_render_seconds',
+    'Время отрисовки шаблонов за HTTP-запрос.'
+)
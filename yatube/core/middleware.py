@@ -0,0 +1,115 @@
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends import django as django_backend
+
+from . import metrics
+from .db_routers import PIN_COOKIE, allow_replica_reads, replica_lag
+
+_local = threading.local()
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self._template_depth = 0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        timings = getattr(_local, 'timings', None)
+        if timings is None:
+            return render(self, *args, **kwargs)
+        # Вложенные render() (например, из тегов) не считаем дважды.
+        timings._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timings._template_depth -= 1
+            if not timings._template_depth:
+                timings.template_time += time.perf_counter() - start
+    wrapper.timed = True
+    return wrapper
+
+
+def instrument_templates():
+    template = django_backend.Template
+    if not getattr(template.render, 'timed', False):
+        template.render = _timed_render(template.render)
+
+
+class MetricsMiddleware:
+    """Собирает время запроса, SQL и шаблонов по имени URL.
+
+    Значения попадают в гистограммы core.metrics (их отдаёт /metrics),
+    а при METRICS_DEBUG_HEADER разбивка по запросу пишется
+    в заголовок Server-Timing ответа.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_templates()
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        _local.timings = timings
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.db_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.timings = None
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.REQUEST_DURATION.observe(duration, view=view)
+        metrics.DB_QUERIES.observe(timings.queries, view=view)
+        metrics.DB_DURATION.observe(timings.db_time, view=view)
+        metrics.TEMPLATE_DURATION.observe(timings.template_time, view=view)
+        if getattr(settings, 'METRICS_DEBUG_HEADER', False):
+            response['Server-Timing'] = (
+                f'total;dur={duration * 1000:.1f}, '
+                f'db;dur={timings.db_time * 1000:.1f};'
+                f'desc="{timings.queries} queries", '
+                f'tpl;dur={timings.template_time * 1000:.1f}'
+            )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Разрешает чтение из реплик на время запроса (core.db_routers).
+
+    Если в запросе была запись, ответ ставит cookie, и следующие
+    REPLICA_LAG_SECONDS запросы этого браузера читают из основной БД.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = PIN_COOKIE in request.COOKIES
+        with allow_replica_reads(pinned) as state:
+            response = self.get_response(request)
+            if state.wrote:
+                response.set_cookie(
+                    PIN_COOKIE, '1', max_age=replica_lag(), httponly=True
+                )
+        return response
@@ -0,0 +1,84 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.functional import cached_property
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него отдаём только gzip
+    brotli = None
+
+# Уже сжатые форматы (png, woff2 и т.п.) повторно не сжимаем.
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.json', '.txt', '.xml', '.html',
+)
+COMPRESS_MIN_SIZE = 256
+
+
+def compressors():
+    """(Content-Encoding, суффикс файла, функция сжатия) доступных
+    алгоритмов в порядке предпочтения."""
+    result = [
+        ('gzip', '.gz',
+         lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+    ]
+    if brotli is not None:
+        result.insert(0, ('br', '.br', brotli.compress))
+    return result
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и заранее сжатыми копиями.
+
+    После collectstatic рядом с каждым хешированным текстовым файлом
+    лежат name.gz и (если установлен brotli) name.br - их выбирает
+    core.views.static_file по Accept-Encoding.
+    """
+    # Без манифеста (тесты, свежий checkout) отдаём исходные имена,
+    # а не падаем на каждом {% static %}.
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed):
+            self.compress(hashed_name)
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as source:
+            data = source.read()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return
+        for _, suffix, compress in compressors():
+            compressed = compress(data)
+            # Сжатая копия не меньше оригинала бесполезна.
+            if len(compressed) >= len(data):
+                continue
+            path = self.path(name + suffix)
+            with open(path + '.tmp', 'wb') as target:
+                target.write(compressed)
+            os.replace(path + '.tmp', path)
+
+    @cached_property
+    def hashed_names(self):
+        return frozenset(self.hashed_files.values())
+
+    def is_hashed(self, name):
+        """Имя содержит хеш содержимого и может кешироваться навсегда."""
+        return name in self.hashed_names
@@ -0,0 +1,438 @@
+import gzip
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connections
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, override_settings
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core import jobs
+from core.db_routers import (
+    PIN_COOKIE, PrimaryReplicaRouter, allow_replica_reads, use_primary,
+    use_primary_after
+)
+from core.metrics import REGISTRY
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Job
+from core.writes import serialized_write
+from posts.models import Comment, Group, Post, User
+
+calls = []
+
+
+@jobs.job('tests.record')
+def record(payloads):
+    calls.append(payloads)
+
+
+@jobs.job('tests.fail')
+def fail(payloads):
+    raise RuntimeError('boom')
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_are_stored_and_batched(self):
+        for number in range(3):
+            jobs.enqueue('tests.record', number=number)
+        self.assertEqual(Job.objects.count(), 3)
+        self.assertEqual(calls, [])
+        self.assertEqual(jobs.run_pending(), 3)
+        self.assertEqual(
+            calls, [[{'number': 0}, {'number': 1}, {'number': 2}]]
+        )
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_is_retried_with_backoff(self):
+        jobs.enqueue('tests.fail')
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.run_pending()
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('boom', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(jobs.run_pending(), 0)
+
+    def test_job_fails_after_max_attempts(self):
+        jobs.enqueue('tests.fail')
+        for _ in range(jobs.MAX_ATTEMPTS):
+            Job.objects.update(run_at=timezone.now())
+            with self.assertLogs('core.jobs', 'ERROR'):
+                jobs.run_pending()
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    def test_stale_running_job_is_requeued(self):
+        jobs.enqueue('tests.record', number=1)
+        Job.objects.update(
+            status=Job.RUNNING,
+            locked_by='dead-worker',
+            locked_at=timezone.now() - jobs.LOCK_TIMEOUT - timedelta(1)
+        )
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(calls, [[{'number': 1}]])
+
+    @override_settings(JOBS_SYNC=True)
+    def test_sync_mode_runs_immediately(self):
+        jobs.enqueue('tests.record', number=1)
+        self.assertEqual(calls, [[{'number': 1}]])
+        self.assertFalse(Job.objects.exists())
+
+    def test_run_jobs_command(self):
+        jobs.enqueue('tests.record', number=1)
+        call_command('run_jobs', once=True, stdout=StringIO())
+        self.assertEqual(calls, [[{'number': 1}]])
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        REGISTRY.clear()
+
+    @override_settings(METRICS_DEBUG_HEADER=True)
+    def test_debug_header_shows_breakdown(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertRegex(
+            response['Server-Timing'],
+            r'total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", '
+            r'tpl;dur=[\d.]+'
+        )
+
+    def test_metrics_are_exported_per_view(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(
+            response['Content-Type'],
+            'text/plain; version=0.0.4; charset=utf-8'
+        )
+        content = response.content.decode()
+        for line in (
+            '# TYPE yatube_request_duration_seconds histogram',
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            'yatube_db_queries_bucket{view="posts:index",le="+Inf"} 2',
+            'yatube_template_render_seconds_count{view="posts:index"} 2',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, content)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_metrics_are_not_public(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        self.client.force_login(
+            User.objects.create_user(username='staff', is_staff=True)
+        )
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_LAG_SECONDS=5)
+class ReplicaRouterTest(SimpleTestCase):
+    router = PrimaryReplicaRouter()
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_request_reads_use_replica(self):
+        with allow_replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_read(Session), 'default')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            # После записи запрос дочитывает из основной БД.
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_pinned_reads_use_primary(self):
+        with allow_replica_reads(pinned=True):
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        with allow_replica_reads(), use_primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        with allow_replica_reads():
+            with use_primary_after(timezone.now().timestamp()):
+                self.assertEqual(self.router.db_for_read(Post), 'default')
+            with use_primary_after(timezone.now().timestamp() - 10):
+                self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+    def test_write_sets_pin_cookie(self):
+        def view(request):
+            if request.method == 'POST':
+                self.router.db_for_write(Post)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        factory = RequestFactory()
+        self.assertNotIn(PIN_COOKIE, middleware(factory.get('/')).cookies)
+        cookie = middleware(factory.post('/')).cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class SyncReplicasTest(SimpleTestCase):
+    """sync_replicas копирует файл основной базы, и чтения в запросе
+    идут в копию."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for alias in ('primary', 'replica'):
+            connections.databases[alias] = {
+                'ENGINE': 'core.backends.sqlite3',
+                'NAME': os.path.join(self.directory, f'{alias}.sqlite3'),
+            }
+        self.addCleanup(self.remove_databases)
+        with connections['primary'].schema_editor() as editor:
+            for model in (User, Group, Post):
+                editor.create_model(model)
+        # bulk_create без сигналов: им нужна база default.
+        User.objects.using('primary').bulk_create([User(username='author')])
+        Post.objects.using('primary').bulk_create([
+            Post(text='Пост в основной базе', author_id=1)
+        ])
+
+    def remove_databases(self):
+        for alias in ('primary', 'replica'):
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_sync_copies_primary(self):
+        output = StringIO()
+        call_command('sync_replicas', database='primary', stdout=output)
+        self.assertIn('replica.sqlite3', output.getvalue())
+        with allow_replica_reads():
+            router = PrimaryReplicaRouter()
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            post = Post.objects.get()
+        self.assertEqual(post._state.db, 'replica')
+        self.assertEqual(post.text, 'Пост в основной базе')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_requires_replicas(self):
+        with self.assertRaises(CommandError):
+            call_command('sync_replicas', database='primary')
+
+
+class StressRouter:
+    """Все модели - в файловую базу 'stress'."""
+
+    def db_for_read(self, model, **hints):
+        return 'stress'
+
+    def db_for_write(self, model, **hints):
+        return 'stress'
+
+
+def write_comments(post_id, author_id, number, count):
+    # Выполняется в дочернем процессе: очередь записи держит flock,
+    # а не Lock этого процесса.
+    try:
+        for index in range(count):
+            serialized_write(
+                Comment.objects.create, post_id=post_id,
+                author_id=author_id, text=f'{number}-{index}',
+                using='stress'
+            )
+    finally:
+        connections['stress'].close()
+
+
+@override_settings(DATABASE_ROUTERS=[StressRouter()])
+class SQLiteWriteStressTest(SimpleTestCase):
+    """Параллельные комментарии в файловую SQLite не падают
+    с "database is locked", а сигналы обновляют счётчики."""
+    THREADS = 8
+    PROCESSES = 4
+    COMMENTS = 25
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        connections.databases['stress'] = {
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': os.path.join(self.directory, 'stress.sqlite3'),
+        }
+        self.addCleanup(self.remove_database)
+        call_command('migrate', database='stress', verbosity=0)
+        self.author = User.objects.create(username='author')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+
+    def remove_database(self):
+        connections['stress'].close()
+        del connections['stress']
+        del connections.databases['stress']
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_pragmas(self):
+        with connections['stress'].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone(), ('wal',))
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone(), (1,))
+
+    def test_concurrent_comments(self):
+        errors = []
+        start = threading.Barrier(self.THREADS)
+
+        def worker(number):
+            start.wait()
+            try:
+                for index in range(self.COMMENTS):
+                    serialized_write(
+                        Comment.objects.create, post=self.post,
+                        author=self.author, text=f'{number}-{index}',
+                        using='stress'
+                    )
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections['stress'].close()
+
+        threads = [
+            threading.Thread(target=worker, args=(number,))
+            for number in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        total = self.THREADS * self.COMMENTS
+        self.assertEqual(Comment.objects.count(), total)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, total)
+
+    @skipUnless(
+        'fork' in multiprocessing.get_all_start_methods(),
+        'Дочерним процессам нужны настройки тестов, а их даёт только fork.'
+    )
+    def test_concurrent_processes(self):
+        # Дочерние процессы открывают свои соединения.
+        connections['stress'].close()
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=write_comments, args=(
+                self.post.pk, self.author.pk, number, self.COMMENTS
+            ))
+            for number in range(self.PROCESSES)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+        self.assertEqual(
+            [process.exitcode for process in processes],
+            [0] * self.PROCESSES
+        )
+        total = self.PROCESSES * self.COMMENTS
+        self.assertEqual(Comment.objects.count(), total)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, total)
+
+    def test_no_retry_after_func_started(self):
+        calls = []
+
+        def write():
+            calls.append(Comment.objects.create(
+                post=self.post, author=self.author, text='Комментарий'
+            ))
+            raise OperationalError('database is locked')
+
+        with self.assertRaises(OperationalError):
+            serialized_write(write, using='stress')
+        # Повтор сохранил бы тот же объект с pk как обновление.
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(Comment.objects.exists())
+
+
+class StaticFilesTest(SimpleTestCase):
+    """collectstatic пишет хешированные имена и сжатые копии,
+    static_file выбирает копию по Accept-Encoding."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=cls.static_root
+        )
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.css = staticfiles_storage.stored_name('css/bootstrap.min.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, name, **headers):
+        return self.client.get(
+            reverse('static', kwargs={'path': name}), **headers
+        )
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.assertNotEqual(self.css, 'css/bootstrap.min.css')
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.static_root, 'staticfiles.json')
+        ))
+        path = os.path.join(self.static_root, self.css)
+        self.assertTrue(os.path.isfile(path + '.gz'))
+        with open(path, 'rb') as original:
+            with gzip.open(path + '.gz') as compressed:
+                self.assertEqual(compressed.read(), original.read())
+        # png уже сжат - копий не делаем.
+        logo = staticfiles_storage.stored_name('img/logo.png')
+        self.assertFalse(
+            os.path.exists(os.path.join(self.static_root, logo + '.gz'))
+        )
+
+    def test_gzip_is_served_when_accepted(self):
+        response = self.get(self.css, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(
+            response['Cache-Control'], 'public, max-age=31536000, immutable'
+        )
+        body = gzip.decompress(b''.join(response.streaming_content))
+        with open(os.path.join(self.static_root, self.css), 'rb') as file:
+            self.assertEqual(body, file.read())
+
+    def test_identity_when_gzip_not_accepted(self):
+        for header in ('', 'gzip;q=0, identity'):
+            with self.subTest(header=header):
+                response = self.get(self.css, HTTP_ACCEPT_ENCODING=header)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                response.close()
+
+    def test_unhashed_name_is_not_immutable(self):
+        response = self.get('css/bootstrap.min.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+
+    def test_missing_and_outside_files_are_404(self):
+        for name in ('css/missing.css', '../manage.py'):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name).status_code, 404)
+
+    def test_template_uses_hashed_url(self):
+        response = self.client.get(reverse('about:author'))
+        self.assertContains(response, '/static/' + self.css)
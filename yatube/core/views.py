@@ -1,4 +1,24 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from .metrics import REGISTRY
+
+# Хешированные имена не меняются никогда, остальные - короткий кеш.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MUTABLE_CACHE_CONTROL = 'public, max-age=300'
+# Порядок предпочтения заранее сжатых копий.
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию;
@@ -6,4 +26,76 @@ def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
 
 def csrf_failure(request, reason=''):
-    return render(request, 'core/403csrf.html')
\ No newline at end of file
+    return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Метрики в текстовом формате Prometheus.
+
+    Статистика по view и запросам к БД не для посторонних: отдаётся
+    адресам из METRICS_ALLOWED_IPS и персоналу.
+    """
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', [])
+    if (request.META.get('REMOTE_ADDR') not in allowed
+            and not request.user.is_staff):
+        raise PermissionDenied
+    return HttpResponse(
+        REGISTRY.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+@require_safe
+def static_file(request, path):
+    """Файл из STATIC_ROOT; сжатую копию выбираем по Accept-Encoding."""
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    stat = os.stat(fullpath)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime,
+        stat.st_size
+    ):
+        response = HttpResponse(status=304)
+    else:
+        accepted = accepted_encodings(request)
+        encoding, filename = None, fullpath
+        for coding, suffix in STATIC_ENCODINGS:
+            if coding in accepted and os.path.isfile(fullpath + suffix):
+                encoding, filename = coding, fullpath + suffix
+                break
+        content_type, _ = mimetypes.guess_type(fullpath)
+        response = FileResponse(
+            open(filename, 'rb'),
+            content_type=content_type or 'application/octet-stream'
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    is_hashed = getattr(staticfiles_storage, 'is_hashed', None)
+    response['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if is_hashed and is_hashed(path)
+        else MUTABLE_CACHE_CONTROL
+    )
+    return response
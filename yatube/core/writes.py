@@ -0,0 +1,85 @@
+"""Последовательная запись в SQLite.
+
+SQLite допускает одного писателя на файл. Когда писателей много
+(несколько процессов gunicorn), они ждут друг друга внутри SQLite
+по busy_timeout и при долгой очереди получают "database is locked".
+serialized_write выстраивает запись в очередь до обращения к базе:
+потоки процесса - через Lock, процессы - через flock на файле рядом
+с базой. Если блокировка всё-таки не досталась (пишет кто-то вне этой
+очереди, например воркер задач), начало транзакции повторяется
+несколько раз с растущей паузой.
+
+    serialized_write(form.save)
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db import transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows: остаётся только блокировка процесса.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+WRITE_ATTEMPTS = 5
+RETRY_DELAY = 0.05
+
+_process_lock = threading.Lock()
+
+
+@contextmanager
+def _file_lock(path):
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def write_lock(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+        yield
+        return
+    name = connection.settings_dict['NAME']
+    with _process_lock, _file_lock(f'{name}.write-lock'):
+        yield
+
+
+def is_locked_error(error):
+    return 'database is locked' in str(error)
+
+
+def serialized_write(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Выполняет func(*args, **kwargs) в транзакции, по очереди
+    с другими писателями, и возвращает её результат."""
+    if connections[using].in_atomic_block:
+        # Внешнюю транзакцию отсюда не повторить.
+        return func(*args, **kwargs)
+    for attempt in range(1, WRITE_ATTEMPTS + 1):
+        started = False
+        try:
+            with write_lock(using), transaction.atomic(using=using):
+                started = True
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            # Повторяем только BEGIN IMMEDIATE: после вызова func объекты
+            # уже изменены (сохранённая модель получила pk), и повтор
+            # записал бы их как обновление без сигналов о создании.
+            if (
+                started or not is_locked_error(error)
+                or attempt == WRITE_ATTEMPTS
+            ):
+                raise
+            logger.warning('База занята, попытка записи %s', attempt)
+            time.sleep(RETRY_DELAY * 2 ** attempt)
@@ -1,21 +1,201 @@
+from datetime import MAXYEAR, MINYEAR, datetime
+
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.utils import timezone
+from django.utils.functional import cached_property
 
 from .models import Post, Group
+from .search import filter_posts
+
+# Больше этого числа отфильтрованные записи не считаем.
+COUNT_LIMIT = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator без COUNT(*) по всей таблице.
+
+    Без фильтров число записей оценивается по наибольшему pk (один
+    шаг по индексу; удалённые записи завышают оценку), с фильтрами
+    считается не дальше COUNT_LIMIT. Открытая неполная страница
+    уточняет оценку.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return queryset.order_by('-pk').values_list(
+                'pk', flat=True
+            ).first() or 0
+        return queryset.order_by()[:COUNT_LIMIT].count()
+
+    def page(self, number):
+        page = super().page(number)
+        # Неполная страница - настоящий конец списка: уточняем оценку,
+        # чтобы ссылки не вели на пустые страницы за ним.
+        size = len(page.object_list)
+        if size < self.per_page:
+            bottom = (page.number - 1) * self.per_page
+            if size or not bottom:
+                count = bottom + size
+            else:
+                count = self.object_list.order_by()[:bottom].count()
+            self.__dict__['count'] = count
+            self.__dict__.pop('num_pages', None)
+        return page
+
+
+def parse_number(value, low, high):
+    """Целое из параметра фильтра или None, если оно вне [low, high]."""
+    if value and value.isdigit() and low <= int(value) <= high:
+        return int(value)
+    return None
+
+
+def parse_year(value):
+    # Граничные годы не помещаются в datetime вместе с часовым поясом.
+    return parse_number(value, MINYEAR + 1, MAXYEAR - 1)
+
+
+def year_range(year, month=None):
+    """Границы года (или месяца) для фильтра по индексу pub_date."""
+    if month is None:
+        start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    else:
+        start = datetime(year, month, 1)
+        end = datetime(year + month // 12, month % 12 + 1, 1)
+    return {
+        'pub_date__gte': timezone.make_aware(start),
+        'pub_date__lt': timezone.make_aware(end),
+    }
+
+
+class YearFilter(admin.SimpleListFilter):
+    """Годы публикации без DISTINCT по всей таблице, как у date_hierarchy.
+
+    Крайние даты и наличие постов в каждом году - поиск по индексу.
+    """
+    title = 'год'
+    parameter_name = 'year'
+
+    def lookups(self, request, model_admin):
+        dates = Post.objects.order_by('pub_date').values_list(
+            'pub_date', flat=True
+        )
+        first, last = dates.first(), dates.last()
+        if first is None:
+            return []
+        first = timezone.localtime(first).year
+        last = timezone.localtime(last).year
+        return [
+            (str(year), str(year)) for year in range(last, first - 1, -1)
+            if Post.objects.filter(**year_range(year)).exists()
+        ]
+
+    def queryset(self, request, queryset):
+        year = parse_year(self.value())
+        if year is not None:
+            return queryset.filter(**year_range(year))
+        return queryset
+
+
+class MonthFilter(admin.SimpleListFilter):
+    """Месяцы выбранного года; без года фильтр не показывается."""
+    title = 'месяц'
+    parameter_name = 'month'
+
+    def lookups(self, request, model_admin):
+        year = parse_year(request.GET.get(YearFilter.parameter_name))
+        if year is None:
+            return []
+        return [
+            (str(month), f'{month:02}.{year}') for month in range(1, 13)
+            if Post.objects.filter(**year_range(year, month)).exists()
+        ]
+
+    def queryset(self, request, queryset):
+        year = parse_year(request.GET.get(YearFilter.parameter_name))
+        month = parse_number(self.value(), 1, 12)
+        if year is not None and month is not None:
+            return queryset.filter(**year_range(year, month))
+        return queryset
+
+
+class LoadedAutocompleteSelect(AutocompleteSelect):
+    """AutocompleteSelect, который не ищет выбранный объект в БД.
+
+    Штатный виджет делает запрос за подписью выбранного значения для
+    каждой строки списка; здесь её даёт уже загруженный объект.
+    """
+    selected = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = self.selected
+        if selected is None or [str(v) for v in value] != [str(selected.pk)]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        options.append(self.create_option(
+            name, selected.pk,
+            self.choices.field.label_from_instance(selected),
+            True, len(options)
+        ))
+        return [(None, options, 0)]
+
+
+class PostChangeListForm(forms.ModelForm):
+    """Строка list_editable: группа уже есть в list_select_related."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # formfield_for_dbfield оборачивает виджет ссылками "добавить".
+        widget = self.fields['group'].widget
+        widget = getattr(widget, 'widget', widget)
+        if self.instance.group_id and hasattr(widget, 'selected'):
+            widget.selected = self.instance.group
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    # Виджет с поиском вместо <select> со всеми группами в каждой строке.
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('pub_date', )
+    list_filter = (YearFilter, MonthFilter)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.autocomplete_fields:
+            kwargs['widget'] = LoadedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using')
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', PostChangeListForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по полнотекстовому индексу вместо LIKE '%...%'.
+        if not search_term:
+            return queryset, False
+        return filter_posts(queryset, search_term), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description',)
     list_editable = ('slug',)
     search_fields = ('title',)
-    list_filter = ('slug', )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     prepopulated_fields = {"slug": ("title",)}
     empty_value_display = '-пусто-'
 
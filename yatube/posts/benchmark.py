@@ -0,0 +1,346 @@
+"""Воспроизводимый набор данных и нагрузочный прогон основных страниц.
+
+seed() заполняет БД детерминированно (random.Random(seed)), поэтому
+результаты run() можно сравнивать между коммитами на одних и тех же
+данных. run() ходит по HTTP в запущенный локальный сервер.
+"""
+import io
+import math
+import random
+import re
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from http.cookiejar import CookieJar
+from itertools import islice
+from urllib import error, parse, request
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Max
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .counters import rebuild_counters
+from .images import normalize_image
+from .importer import keep_dates
+from .models import Comment, Group, Post, User
+from .search import fts_enabled, rebuild_index
+from .thumbnails import generate_thumbnails
+
+USERNAME = 'bench_user_{}'
+PASSWORD = 'bench-password'
+BATCH_SIZE = 1000
+START_DATE = datetime(2023, 1, 1, tzinfo=timezone.utc)
+WORDS = (
+    'яндекс практикум django лента пост группа автор комментарий '
+    'картинка поиск кэш индекс запрос страница подписка профиль'
+).split()
+DEFAULT_MIX = {
+    'index': 40,
+    'group_list': 15,
+    'profile': 15,
+    'post_detail': 25,
+    'add_comment': 3,
+    'post_create': 2,
+}
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _bulk(model, objects):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, BATCH_SIZE))
+        if not batch:
+            return
+        model.objects.bulk_create(batch)
+
+
+def _image(rng, number):
+    """Поля картинки поста: файл проходит ту же нормализацию
+    и хранилище, что и загрузка через форму."""
+    color = tuple(rng.randrange(256) for _ in range(3))
+    image = Image.new('RGB', (1200, 800), color)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    normalized = normalize_image(
+        ContentFile(buffer.getvalue(), name=f'bench_{number}.jpg')
+    )
+    post = Post()
+    post.image.save(normalized.file.name, normalized.file, save=False)
+    return {
+        'image': post.image.name,
+        'image_width': normalized.width,
+        'image_height': normalized.height,
+        'image_placeholder': normalized.placeholder,
+    }
+
+
+def seed(users=50, groups=10, posts=2000, comments=5000, images=20,
+         seed_value=42):
+    """Создаёт набор данных; повторный запуск с тем же seed даёт те же
+    тексты, авторов, группы и даты.
+
+    Авторы, группы и посты для комментариев выбираются только среди
+    созданных этим запуском: уже лежащие в БД данные на выбор не влияют.
+    """
+    rng = random.Random(seed_value)
+    password = make_password(PASSWORD)
+    pub_date = Post._meta.get_field('pub_date')
+    created = Comment._meta.get_field('created')
+    with transaction.atomic():
+        first_user = User.objects.count()
+        usernames = [
+            USERNAME.format(first_user + number) for number in range(users)
+        ]
+        User.objects.bulk_create(
+            User(username=username, password=password)
+            for username in usernames
+        )
+        user_ids = list(User.objects.filter(
+            username__in=usernames
+        ).order_by('pk').values_list('pk', flat=True))
+        first_group = Group.objects.count()
+        slugs = [
+            f'bench-group-{first_group + number}' for number in range(groups)
+        ]
+        Group.objects.bulk_create(
+            Group(
+                title=f'Группа {first_group + number}',
+                slug=slug,
+                description=_text(rng, 20)
+            )
+            for number, slug in enumerate(slugs)
+        )
+        group_ids = list(Group.objects.filter(
+            slug__in=slugs
+        ).order_by('pk').values_list('pk', flat=True))
+        image_fields = [_image(rng, number) for number in range(images)]
+        # bulk_create в SQLite не возвращает pk: новые посты - те,
+        # что после последнего существующего.
+        last_post = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        # Даты в данных фиксированы, чтобы прогоны были сравнимы.
+        with keep_dates(pub_date, created):
+            _bulk(Post, (
+                Post(
+                    text=_text(rng, rng.randint(5, 60)),
+                    author_id=rng.choice(user_ids),
+                    group_id=(
+                        rng.choice(group_ids) if rng.random() < 0.7 else None
+                    ),
+                    pub_date=START_DATE + timedelta(minutes=number),
+                    **(
+                        rng.choice(image_fields)
+                        if image_fields and rng.random() < 0.3 else {}
+                    ),
+                )
+                for number in range(posts)
+            ))
+            post_ids = list(Post.objects.filter(
+                pk__gt=last_post
+            ).order_by('pk').values_list('pk', flat=True))
+            _bulk(Comment, (
+                Comment(
+                    post_id=rng.choice(post_ids),
+                    author_id=rng.choice(user_ids),
+                    text=_text(rng, rng.randint(3, 30)),
+                    created=START_DATE + timedelta(minutes=number),
+                )
+                for number in range(comments)
+            ) if post_ids else ())
+    rebuild_counters()
+    if fts_enabled():
+        rebuild_index()
+    for post in Post.objects.exclude(image='').filter(thumbnails=''):
+        generate_thumbnails(post)
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class _NoRedirect(request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Client:
+    """HTTP-клиент одного виртуального пользователя со своей сессией."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = CookieJar()
+        self.opener = request.build_opener(
+            request.HTTPCookieProcessor(self.cookies), _NoRedirect
+        )
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def call(self, path, data=None):
+        body = None
+        if data is not None:
+            data = {**data, 'csrfmiddlewaretoken': self.csrf_token()}
+            body = parse.urlencode(data).encode()
+        req = request.Request(self.base_url + path, data=body)
+        if body is not None:
+            req.add_header('Referer', self.base_url + path)
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                response.read()
+                return response.status, response.headers
+        except error.HTTPError as response:
+            return response.code, response.headers
+
+    def login(self, username):
+        path = reverse('users:login')
+        self.call(path)
+        self.call(path, {'username': username, 'password': PASSWORD})
+
+
+class Targets:
+    """Адреса для запросов, выбранные из засеянных данных."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.usernames = list(User.objects.filter(
+            username__startswith='bench_user_'
+        ).values_list('username', flat=True))
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        self.post_ids = list(Post.objects.values_list('pk', flat=True))
+        if not (self.usernames and self.slugs and self.post_ids):
+            raise ValueError(
+                'Нет данных для прогона: выполните seed_benchmark_data.'
+            )
+
+    def request(self, endpoint):
+        rng = self.rng
+        if endpoint == 'index':
+            return reverse('posts:index'), None
+        if endpoint == 'group_list':
+            return reverse(
+                'posts:group_list', args=[rng.choice(self.slugs)]
+            ), None
+        if endpoint == 'profile':
+            return reverse(
+                'posts:profile', args=[rng.choice(self.usernames)]
+            ), None
+        post_id = rng.choice(self.post_ids)
+        if endpoint == 'post_detail':
+            return reverse('posts:post_detail', args=[post_id]), None
+        if endpoint == 'add_comment':
+            return reverse('posts:add_comment', args=[post_id]), {
+                'text': _text(rng, 10)
+            }
+        if endpoint == 'post_create':
+            return reverse('posts:post_create'), {'text': _text(rng, 30)}
+        raise ValueError(f'Неизвестный адрес: {endpoint}')
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _summary(samples, duration=None):
+    latencies = [sample['latency'] for sample in samples]
+    queries = [
+        sample['queries'] for sample in samples
+        if sample['queries'] is not None
+    ]
+    summary = {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample['status'] >= 400),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'queries_per_request': (
+            sum(queries) / len(queries) if queries else None
+        ),
+    }
+    if duration:
+        summary['throughput_rps'] = len(samples) / duration
+    return summary
+
+
+def run(base_url, requests_total=1000, concurrency=8, mix=None,
+        seed_value=42):
+    """Выполняет requests_total запросов в concurrency потоков."""
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed_value)
+    targets = Targets(rng)
+    endpoints, weights = zip(*mix.items())
+    plan = [
+        (endpoint, *targets.request(endpoint))
+        for endpoint in rng.choices(endpoints, weights, k=requests_total)
+    ]
+    lock = threading.Lock()
+    samples = defaultdict(list)
+
+    def worker(number):
+        # Читают анонимы, как большинство реальных посетителей;
+        # пишет залогиненный пользователь.
+        reader = Client(base_url)
+        writer = Client(base_url)
+        writer.login(targets.usernames[number % len(targets.usernames)])
+        for endpoint, path, data in plan[number::concurrency]:
+            client = reader if data is None else writer
+            start = time.perf_counter()
+            status, headers = client.call(path, data)
+            latency = (time.perf_counter() - start) * 1000
+            match = QUERIES_RE.search(headers.get('Server-Timing', ''))
+            with lock:
+                samples[endpoint].append({
+                    'status': status,
+                    'latency': latency,
+                    'queries': int(match.group(1)) if match else None,
+                })
+
+    threads = [
+        threading.Thread(target=worker, args=(number,))
+        for number in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+    return {
+        'commit': git_commit(),
+        'base_url': base_url,
+        'requests': requests_total,
+        'concurrency': concurrency,
+        'seed': seed_value,
+        'mix': mix,
+        'duration_s': duration,
+        'total': _summary(
+            [sample for items in samples.values() for sample in items],
+            duration
+        ),
+        'endpoints': {
+            endpoint: _summary(items)
+            for endpoint, items in sorted(samples.items())
+        },
+    }
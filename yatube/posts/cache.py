@@ -0,0 +1,200 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control
+)
+from django.utils.http import http_date, quote_etag, urlencode
+
+from core.db_routers import use_primary_after
+
+from .models import CacheScope, Group, User
+
+# Страницы живут в кэше, пока их не вытеснит запись в соответствующей
+# области: устаревание по таймеру отдавало бы старую ленту после записи.
+PAGE_CACHE_TIMEOUT = None
+# Единственные GET-параметры страниц под кэшем - курсоры KeysetPaginator.
+PAGE_CACHE_PARAMS = ('after', 'before')
+
+INDEX_SCOPE = 'index'
+GROUPS_SCOPE = 'groups'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def profile_scope(username):
+    return f'profile:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def user_scope(user_id):
+    """Личные данные пользователя, видные на всех страницах: подписки."""
+    return f'user:{user_id}'
+
+
+def post_scopes(author_id, group_ids):
+    """Области кэша, в которых показывается пост с такими связями."""
+    scopes = [INDEX_SCOPE]
+    scopes += [
+        profile_scope(username) for username in
+        User.objects.filter(pk=author_id).values_list('username', flat=True)
+    ]
+    group_ids = [group_id for group_id in group_ids if group_id is not None]
+    if group_ids:
+        scopes += [
+            group_scope(slug) for slug in Group.objects.filter(
+                pk__in=group_ids
+            ).values_list('slug', flat=True)
+        ]
+    return scopes
+
+
+def scope_versions(scopes):
+    """Версии областей одним запросом; у нетронутой области версия 0."""
+    found = dict(
+        CacheScope.objects.filter(name__in=scopes).values_list(
+            'name', 'version'
+        )
+    )
+    return [found.get(scope, 0) for scope in scopes]
+
+
+def request_scope_versions(request, scopes):
+    """Версии областей, прочитанные из БД один раз за запрос.
+
+    Кэш страниц и conditional_page спрашивают одни и те же области.
+    """
+    known = request.__dict__.setdefault('_scope_versions', {})
+    missing = [scope for scope in scopes if scope not in known]
+    if missing:
+        known.update(zip(missing, scope_versions(missing)))
+    return [known[scope] for scope in scopes]
+
+
+def invalidate(*scopes):
+    """Сбрасывает все закэшированные страницы указанных областей.
+
+    Новая версия - время записи в нс (но не меньше прежней + 1), она
+    пишется в той же транзакции, что и данные: до коммита другие
+    запросы видят старые данные под старой версией, после - новые.
+    """
+    scopes = set(scopes)
+    if not scopes:
+        return
+    now = time.time_ns()
+    CacheScope.objects.bulk_create(
+        [CacheScope(name=scope, version=now) for scope in scopes],
+        ignore_conflicts=True
+    )
+    CacheScope.objects.filter(name__in=scopes).update(
+        version=Greatest(F('version') + 1, now)
+    )
+
+
+def fresh_reads(*versions):
+    """Читать из основной БД, если реплики могли не получить запись.
+
+    Страница, собранная по отстающей реплике, попала бы в кэш (или
+    получила бы ETag) под новой версией и оставалась бы устаревшей
+    до следующей записи в область.
+    """
+    return use_primary_after(max(versions) / 10 ** 9)
+
+
+def page_cache(scopes_func):
+    """Разрешает кэшировать страницу целиком для анонимных читателей.
+
+    Саму работу делает posts.middleware.AnonymousPageCacheMiddleware:
+    он находит view по URL ещё до сессий и CSRF и по scopes_func
+    (аргументы view -> области кэша) строит ключ из версий областей.
+    Декоратор должен быть внешним, иначе middleware его не увидит.
+    """
+    def decorator(view):
+        view.page_cache_scopes = scopes_func
+        return view
+    return decorator
+
+
+def has_page_params_only(request):
+    """В адресе нет параметров, кроме курсоров (каждый по одному разу).
+
+    Прочие параметры страницу не меняют, но каждый новый адрес занял бы
+    в кэше место и вытеснил настоящие страницы, так что такие запросы
+    мимо кэша.
+    """
+    return all(
+        name in PAGE_CACHE_PARAMS and len(request.GET.getlist(name)) == 1
+        for name in request.GET
+    )
+
+
+def response_key(versions, request):
+    """Ключ готового ответа по пути, курсорам и версиям областей кэша."""
+    params = urlencode([
+        (name, request.GET[name])
+        for name in PAGE_CACHE_PARAMS if name in request.GET
+    ])
+    digest = hashlib.md5(
+        f'{request.path}?{params}:{versions}'.encode()
+    ).hexdigest()
+    return f'posts:response:{digest}'
+
+
+def conditional_page(scopes_func):
+    """Отвечает 304 Not Modified, если страница не менялась.
+
+    Валидаторы строятся из версий областей кэша (posts.CacheScope),
+    которые scope_func возвращает по аргументам view: версия меняется
+    в одной транзакции с любой записью в область, включая правку
+    и удаление. Поэтому проверка стоит одного запроса по первичному
+    ключу и выполняется до view. Авторизованным страница рисуется
+    по-своему, так что в ETag входят id пользователя и версия его личной
+    области.
+
+    Last-Modified точен до секунды, и запись в ту же секунду его бы
+    не изменила: If-Modified-Since получал бы 304 на изменённую
+    страницу. Поэтому дата отдаётся, только когда секунда последней
+    записи уже прошла, а до того проверка идёт лишь по ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            scopes = list(scopes_func(*args, **kwargs))
+            user = request.user
+            if user.is_authenticated:
+                scopes.append(user_scope(user.pk))
+            versions = request_scope_versions(request, scopes)
+            etag = quote_etag(hashlib.md5(
+                f'{user.pk}:{request.get_full_path()}:{versions}'.encode()
+            ).hexdigest())
+            last_modified = max(versions) // 10 ** 9
+            if last_modified >= int(time.time()):
+                last_modified = None
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                with fresh_reads(*versions):
+                    response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+                # Без явного Cache-Control прокси вправе сами решить,
+                # сколько хранить страницу; здесь - только с проверкой.
+                patch_cache_control(response, no_cache=True)
+                if user.is_authenticated:
+                    patch_cache_control(response, private=True)
+            return response
+        return wrapper
+    return decorator
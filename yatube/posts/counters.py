@@ -0,0 +1,103 @@
+from django.db import transaction
+from django.db.models import (
+    CharField, Count, F, IntegerField, OuterRef, Subquery, Value
+)
+from django.db.models.functions import Coalesce, Greatest, Substr
+
+from users.models import Profile
+from .models import GROUP_PREVIEW_LENGTH, Comment, Group, Post, User
+
+
+def change_counter(queryset, field, delta):
+    """Атомарно сдвигает счётчик в БД, не читая его значение.
+
+    Счётчик не опускается ниже нуля: поле PositiveIntegerField,
+    и рассинхронизация не должна ломать удаление записей.
+    """
+    if not delta:
+        return 0
+    return queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def change_posts_count(author_id=None, group_id=None, delta=1):
+    if group_id is not None:
+        change_counter(
+            Group.objects.filter(pk=group_id), 'posts_count', delta
+        )
+    if author_id is not None:
+        # Профиль создаётся вместе с пользователем (users.signals), здесь
+        # только обновляется: при удалении пользователя с постами профиля
+        # уже нет, и создать его заново было бы ошибкой.
+        change_counter(
+            Profile.objects.filter(user_id=author_id), 'posts_count', delta
+        )
+
+
+def change_comments_count(post_id, delta=1):
+    if post_id is not None:
+        change_counter(
+            Post.objects.filter(pk=post_id), 'comments_count', delta
+        )
+
+
+def _group_activity():
+    # Последний пост группы находится по индексу (group, -pub_date, -id).
+    latest = Post.objects.filter(group=OuterRef('pk')).order_by(
+        '-pub_date', '-id'
+    )
+    return {
+        'last_post_at': Subquery(latest.values('pub_date')[:1]),
+        'last_post_preview': Coalesce(
+            Subquery(
+                latest.annotate(
+                    preview=Substr('text', 1, GROUP_PREVIEW_LENGTH)
+                ).values('preview')[:1],
+                output_field=CharField()
+            ),
+            Value('')
+        ),
+    }
+
+
+def refresh_group_activity(group_ids):
+    """Пересчитывает дату и начало последнего поста у групп."""
+    group_ids = [group_id for group_id in group_ids if group_id is not None]
+    if group_ids:
+        Group.objects.filter(pk__in=group_ids).update(**_group_activity())
+
+
+def _count(queryset, field, outer_field='pk'):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def rebuild_counters():
+    """Пересчитывает все счётчики несколькими UPDATE на всю таблицу."""
+    with transaction.atomic():
+        Post.objects.update(comments_count=_count(Comment.objects, 'post'))
+        Group.objects.update(
+            posts_count=_count(Post.objects, 'group'), **_group_activity()
+        )
+        # Профили пользователей, созданных в обход сигналов.
+        Profile.objects.bulk_create(
+            (
+                Profile(user_id=user_id)
+                for user_id in User.objects.filter(
+                    profile__isnull=True
+                ).values_list('pk', flat=True).iterator()
+            ),
+            batch_size=500,
+            ignore_conflicts=True
+        )
+        Profile.objects.update(
+            posts_count=_count(Post.objects, 'author', 'user')
+        )
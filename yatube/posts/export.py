@@ -0,0 +1,62 @@
+"""Потоковая выгрузка постов.
+
+Строки читаются из БД через iterator() порциями по CHUNK_SIZE и сразу
+сериализуются по одной, поэтому ни queryset, ни результат целиком
+в памяти не держатся. Формат полей совпадает с тем, что принимает
+команда import_posts.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+CHUNK_SIZE = 2000
+COLUMNS = ('type', 'id', 'author', 'group', 'text', 'pub_date', 'image')
+FIELDS = ('pk', 'author__username', 'group__slug', 'text', 'pub_date',
+          'image')
+
+
+def export_rows(queryset):
+    for row in queryset.order_by('pk').values_list(*FIELDS).iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        yield dict(zip(COLUMNS, ('post',) + row))
+
+
+def _dumps(row):
+    return json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def stream_json(rows):
+    yield '['
+    for number, row in enumerate(rows):
+        yield (',\n' if number else '\n') + _dumps(row)
+    yield '\n]\n'
+
+
+def stream_jsonl(rows):
+    for row in rows:
+        yield _dumps(row) + '\n'
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=COLUMNS)
+    yield writer.writerow(dict(zip(COLUMNS, COLUMNS)))
+    for row in rows:
+        yield writer.writerow(
+            {key: '' if value is None else value for key, value in row.items()}
+        )
+
+
+FORMATS = {
+    'json': (stream_json, 'application/json'),
+    'jsonl': (stream_jsonl, 'application/x-ndjson'),
+    'csv': (stream_csv, 'text/csv'),
+}
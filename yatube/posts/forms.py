@@ -1,13 +1,39 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from core.jobs import enqueue
+
+from .images import normalize_image
 from .models import Post, Comment
 
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         # Добавили поле image в форму
         fields = ('group', 'text', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            # Картинку не меняли (старый файл) или очистили (False).
+            return image
+        normalized = normalize_image(image)
+        self.instance.image_width = normalized.width
+        self.instance.image_height = normalized.height
+        self.instance.image_placeholder = normalized.placeholder
+        return normalized.file
+
+    def save(self, commit=True):
+        if 'image' in self.changed_data and not self.cleaned_data['image']:
+            self.instance.image_width = self.instance.image_height = None
+            self.instance.image_placeholder = ''
+        post = super().save(commit)
+        # Превью готовятся при загрузке, а не при первом показе ленты.
+        if commit and 'image' in self.changed_data:
+            enqueue('posts.generate_thumbnails', post_id=post.pk)
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
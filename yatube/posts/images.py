@@ -0,0 +1,90 @@
+"""Приведение загруженных картинок к единому виду.
+
+Оригинал уменьшается до IMAGE_MAX_SIZE, поворачивается по EXIF
+и перекодируется в WebP (JPEG, если Pillow собран без WebP) без EXIF
+и прочих метаданных; цветовой профиль сохраняется. Результат пишется
+во временный файл, который уходит на диск, если больше SPOOL_SIZE.
+У анимированных GIF остаётся первый кадр.
+
+Заодно считаются размеры и крошечная превью-заглушка (data URI),
+по которым лента размечает картинку, не открывая файл.
+"""
+import base64
+import os
+import tempfile
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from PIL import Image, ImageOps, features
+
+IMAGE_MAX_SIZE = (1920, 1920)
+PLACEHOLDER_SIZE = (16, 16)
+SPOOL_SIZE = 1024 * 1024
+
+if features.check('webp'):
+    FORMAT, EXTENSION, SAVE_OPTIONS = 'WEBP', '.webp', {
+        'quality': 82, 'method': 4
+    }
+else:
+    FORMAT, EXTENSION, SAVE_OPTIONS = 'JPEG', '.jpg', {
+        'quality': 85, 'optimize': True, 'progressive': True
+    }
+
+
+class NormalizedImage:
+    def __init__(self, file, width, height, placeholder):
+        self.file = file
+        self.width = width
+        self.height = height
+        self.placeholder = placeholder
+
+
+def _open(source):
+    """Картинка, повёрнутая по EXIF и в режиме, пригодном для FORMAT."""
+    source.seek(0)
+    try:
+        image = Image.open(source)
+        # Для JPEG декодер сразу уменьшает картинку кратно 1/2..1/8:
+        # полноразмерный оригинал не раскладывается в памяти.
+        image.draft('RGB', IMAGE_MAX_SIZE)
+        image = ImageOps.exif_transpose(image)
+    except (Image.DecompressionBombError, OSError):
+        raise ValidationError('Не удалось прочитать картинку.')
+    has_alpha = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+    if FORMAT == 'JPEG' or not has_alpha:
+        return image.convert('RGB')
+    return image.convert('RGBA')
+
+
+def placeholder(image):
+    """Картинка 16x16 в data URI: показывается, пока грузится превью."""
+    tiny = image.copy()
+    tiny.thumbnail(PLACEHOLDER_SIZE)
+    buffer = BytesIO()
+    tiny.convert('RGB').save(buffer, FORMAT, quality=30)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/{FORMAT.lower()};base64,{encoded}'
+
+
+def describe(source):
+    """Размеры и заглушка уже сохранённой картинки."""
+    image = _open(source)
+    return image.width, image.height, placeholder(image)
+
+
+def normalize_image(uploaded):
+    image = _open(uploaded)
+    # Из метаданных оставляем только цветовой профиль: без него
+    # фотографии в широком охвате выглядят блёклыми.
+    icc_profile = image.info.get('icc_profile')
+    image.thumbnail(IMAGE_MAX_SIZE, Image.LANCZOS)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    image.save(spool, FORMAT, icc_profile=icc_profile, **SAVE_OPTIONS)
+    spool.seek(0)
+    name = os.path.splitext(os.path.basename(uploaded.name))[0] + EXTENSION
+    return NormalizedImage(
+        File(spool, name=name), image.width, image.height, placeholder(image)
+    )
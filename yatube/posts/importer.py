@@ -0,0 +1,198 @@
+"""Потоковый импорт групп, постов и комментариев пачками.
+
+Записи читаются итератором и обрабатываются пачками фиксированного
+размера: на каждую пачку приходится по одному запросу на поиск авторов
+и групп и по одному bulk_create на модель, каждая пачка - отдельная
+транзакция. Поэтому память не растёт с размером файла.
+"""
+import csv
+import json
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import (
+    GROUPS_SCOPE, INDEX_SCOPE, group_scope, invalidate, profile_scope
+)
+from .models import Comment, Group, Post, User
+
+BATCH_SIZE = 1000
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    for row in csv.DictReader(stream):
+        yield {key: value for key, value in row.items() if value}
+
+
+@contextmanager
+def keep_dates(*fields):
+    """Не даёт auto_now_add затереть даты из импортируемых данных.
+
+    Флаг меняется у общего для процесса поля модели, поэтому блок
+    должен быть как можно короче: только сама вставка.
+    """
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now_add in zip(fields, saved):
+            field.auto_now_add = auto_now_add
+
+
+class ImportStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.rows = 0
+        self.created = {'group': 0, 'post': 0, 'comment': 0}
+        self.skipped = 0
+
+    @property
+    def rate(self):
+        return self.rows / max(time.monotonic() - self.started, 1e-9)
+
+
+class Importer:
+    def __init__(self, batch_size=BATCH_SIZE, create_users=False,
+                 progress=None):
+        self.batch_size = batch_size
+        self.create_users = create_users
+        self.progress = progress
+        self.stats = ImportStats()
+
+    def run(self, records):
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return self.stats
+            with transaction.atomic():
+                self.import_batch(batch)
+            self.stats.rows += len(batch)
+            if self.progress:
+                self.progress(self.stats)
+
+    def import_batch(self, batch):
+        by_type = {'group': [], 'post': [], 'comment': []}
+        for record in batch:
+            by_type.get(record.get('type', 'post'), []).append(record)
+        self.stats.skipped += len(batch) - sum(map(len, by_type.values()))
+        self.import_groups(by_type['group'])
+        users = self.resolve_users(
+            {record.get('author') for record in batch} - {None}
+        )
+        groups = dict(Group.objects.filter(
+            slug__in={record['group'] for record in by_type['post']
+                      if record.get('group')}
+        ).values_list('slug', 'pk'))
+        self.import_posts(by_type['post'], users, groups)
+        self.import_comments(by_type['comment'], users)
+        invalidate(
+            INDEX_SCOPE,
+            GROUPS_SCOPE,
+            *[group_scope(slug) for slug in groups],
+            *[profile_scope(username) for username in users],
+        )
+
+    def import_groups(self, records):
+        groups = {
+            record['slug']: Group(
+                slug=record['slug'],
+                title=record.get('title', record['slug']),
+                description=record.get('description', '')
+            )
+            for record in records
+        }
+        existing = set(Group.objects.filter(
+            slug__in=groups
+        ).values_list('slug', flat=True))
+        new_groups = [
+            group for slug, group in groups.items() if slug not in existing
+        ]
+        Group.objects.bulk_create(new_groups, ignore_conflicts=True)
+        self.stats.created['group'] += len(new_groups)
+        self.stats.skipped += len(records) - len(new_groups)
+
+    def resolve_users(self, usernames):
+        users = dict(User.objects.filter(
+            username__in=usernames
+        ).values_list('username', 'pk'))
+        missing = usernames - set(users)
+        if missing and self.create_users:
+            User.objects.bulk_create(
+                [User(username=name, password=make_password(None))
+                 for name in missing],
+                ignore_conflicts=True
+            )
+            users.update(User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'pk'))
+        return users
+
+    @staticmethod
+    def _date(value):
+        return (parse_datetime(value) if value else None) or timezone.now()
+
+    def import_posts(self, records, users, groups):
+        # Посты с уже существующим id пропускаются: импорт можно
+        # безопасно перезапустить после сбоя.
+        taken = set(Post.objects.filter(
+            pk__in={int(record['id']) for record in records
+                    if record.get('id')}
+        ).values_list('pk', flat=True))
+        posts = []
+        for record in records:
+            pk = int(record['id']) if record.get('id') else None
+            if (record.get('author') not in users
+                    or not record.get('text') or pk in taken):
+                self.stats.skipped += 1
+                continue
+            if pk is not None:
+                taken.add(pk)
+            date = self._date(record.get('pub_date'))
+            posts.append(Post(
+                pk=pk,
+                text=record['text'],
+                author_id=users[record['author']],
+                group_id=groups.get(record.get('group')),
+                pub_date=date,
+                created=date,
+            ))
+        with keep_dates(
+            Post._meta.get_field('pub_date'), Post._meta.get_field('created')
+        ):
+            Post.objects.bulk_create(posts)
+        self.stats.created['post'] += len(posts)
+
+    def import_comments(self, records, users):
+        existing_posts = set(Post.objects.filter(
+            pk__in={record.get('post') for record in records}
+        ).values_list('pk', flat=True))
+        comments = []
+        for record in records:
+            if (record.get('author') not in users
+                    or int(record.get('post') or 0) not in existing_posts
+                    or not record.get('text')):
+                self.stats.skipped += 1
+                continue
+            comments.append(Comment(
+                post_id=int(record['post']),
+                author_id=users[record['author']],
+                text=record['text'],
+                created=self._date(record.get('created')),
+            ))
+        with keep_dates(Comment._meta.get_field('created')):
+            Comment.objects.bulk_create(comments)
+        self.stats.created['comment'] += len(comments)
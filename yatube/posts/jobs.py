@@ -0,0 +1,38 @@
+from core.jobs import job
+
+from . import timeline
+from .models import Follow, Post
+from .search import fts_enabled, reindex_posts
+from .thumbnails import generate_thumbnails
+
+
+@job('posts.reindex')
+def reindex(payloads):
+    if fts_enabled():
+        reindex_posts({payload['post_id'] for payload in payloads})
+
+
+@job('posts.generate_thumbnails')
+def make_thumbnails(payloads):
+    posts = Post.objects.in_bulk({payload['post_id'] for payload in payloads})
+    for post in posts.values():
+        generate_thumbnails(post)
+
+
+@job('posts.fan_out')
+def fan_out_posts(payloads):
+    posts = Post.objects.in_bulk({payload['post_id'] for payload in payloads})
+    for post in posts.values():
+        timeline.fan_out(post)
+
+
+@job('posts.backfill_timeline')
+def backfill_timeline(payloads):
+    follows = {
+        (payload['user_id'], payload['author_id']) for payload in payloads
+    }
+    for user_id, author_id in follows:
+        # Пока задача ждала в очереди, пользователь мог отписаться.
+        follow = Follow.objects.filter(user_id=user_id, author_id=author_id)
+        if follow.exists():
+            timeline.backfill(user_id, author_id)
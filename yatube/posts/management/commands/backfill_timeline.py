@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow
+
+
+class Command(BaseCommand):
+    help = 'Заполняет ленты подписок постами авторов, на которых подписаны.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Имя пользователя, чью ленту нужно заполнить.'
+        )
+
+    def handle(self, *args, **options):
+        follows = Follow.objects.all()
+        if options['user']:
+            follows = follows.filter(user__username=options['user'])
+        total = 0
+        for user_id, author_id in follows.values_list(
+            'user_id', 'author_id'
+        ).iterator():
+            timeline.backfill(user_id, author_id)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f'Обработано подписок: {total}'))
@@ -0,0 +1,94 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Comment, Group, Post, TimelineEntry
+from posts.utils import KeysetPaginator
+
+# Полный проход по таблице (без индекса) или сортировка во временном
+# B-дереве: на больших таблицах такие планы деградируют линейно.
+BAD_PLAN = re.compile(r'^SCAN \S+$|^SCAN TABLE \S+$|TEMP B-TREE')
+
+
+def feed_queries():
+    """Запросы страниц лент в том виде, в каком их выполняют view."""
+    now = timezone.now()
+    feeds = {
+        'index': (
+            KeysetPaginator(Post.objects.select_related('author', 'group')),
+            now
+        ),
+        'group_list': (
+            KeysetPaginator(
+                Post.objects.filter(group_id=1).select_related(
+                    'author', 'group'
+                )
+            ),
+            now
+        ),
+        'profile': (
+            KeysetPaginator(
+                Post.objects.filter(author_id=1).select_related(
+                    'author', 'group'
+                )
+            ),
+            now
+        ),
+        'follow_index': (
+            KeysetPaginator(
+                TimelineEntry.objects.filter(user_id=1).select_related(
+                    'post__author', 'post__group'
+                )
+            ),
+            now
+        ),
+        'post_detail comments': (
+            KeysetPaginator(
+                Comment.objects.filter(post_id=1).select_related('author'),
+                field='created'
+            ),
+            now
+        ),
+        'group_index': (
+            KeysetPaginator(Group.objects.all(), field='title',
+                            descending=False),
+            'title'
+        ),
+    }
+    for name, (paginator, value) in feeds.items():
+        cursor = (value, 1)
+        yield f'{name} (первая страница)', paginator.page_queryset()
+        yield f'{name} (следующая)', paginator.page_queryset(cursor)
+        yield f'{name} (предыдущая)', paginator.page_queryset(
+            cursor, forward=False
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет через EXPLAIN QUERY PLAN, что запросы лент используют '
+        'индексы без полного прохода и сортировки во временной таблице.'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Проверка планов доступна только для SQLite.')
+        failures = []
+        for name, queryset in feed_queries():
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            bad = [step for step in plan if BAD_PLAN.search(step)]
+            if bad:
+                failures.append(f'{name}: {"; ".join(bad)}')
+            self.stdout.write(f'{"FAIL" if bad else "OK  "} {name}')
+            for step in plan:
+                self.stdout.write(f'       {step}')
+        if failures:
+            raise CommandError(
+                'Неэффективные планы запросов:\n' + '\n'.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS('Все планы используют индексы.'))
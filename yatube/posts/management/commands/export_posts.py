@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import FORMATS, export_rows
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты автора или группы в JSON, JSONL или CSV.'
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--author', help='Имя пользователя.')
+        target.add_argument('--group', help='Slug группы.')
+        parser.add_argument('--format', choices=FORMATS, default='json')
+        parser.add_argument(
+            '--output', default='-', help='Путь к файлу или "-" для stdout.'
+        )
+
+    def handle(self, *args, **options):
+        if options['author']:
+            posts = Post.objects.filter(author__username=options['author'])
+        else:
+            posts = Post.objects.filter(group__slug=options['group'])
+        serializer, _ = FORMATS[options['format']]
+        chunks = serializer(export_rows(posts))
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        try:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as output:
+                output.writelines(chunks)
+        except OSError as error:
+            raise CommandError(error)
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import DEFAULT_MIX, run
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        endpoint, _, weight = item.partition('=')
+        mix[endpoint.strip()] = int(weight)
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенный сервер смесью запросов к основным страницам '
+        'и печатает p50/p95/p99, пропускную способность и число SQL-запросов '
+        'на запрос в JSON. Число запросов берётся из заголовка Server-Timing '
+        '(METRICS_DEBUG_HEADER на сервере).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--mix',
+            type=parse_mix,
+            default=DEFAULT_MIX,
+            help='Веса адресов, например "index=50,post_detail=30,'
+                 'add_comment=5".'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Файл для результата в JSON.')
+
+    def handle(self, *args, **options):
+        try:
+            result = run(
+                options['base_url'],
+                requests_total=options['requests'],
+                concurrency=options['concurrency'],
+                mix=options['mix'],
+                seed_value=options['seed'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        report = json.dumps(result, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(report)
+        self.stdout.write(report)
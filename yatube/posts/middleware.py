@@ -0,0 +1,143 @@
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+from core.storage import compressors
+from core.views import accepted_encodings
+
+from .cache import (
+    PAGE_CACHE_TIMEOUT, fresh_reads, has_page_params_only,
+    request_scope_versions, response_key
+)
+
+# Заголовки, которые пересчитываются для каждого ответа из кэша.
+SKIPPED_HEADERS = ('Content-Length', 'Content-Encoding')
+
+
+def build_entry(response):
+    """Готовый ответ для кэша: заголовки и тела во всех кодировках."""
+    body = response.content
+    bodies = {'identity': body}
+    for encoding, _, compress in compressors():
+        compressed = compress(body)
+        if len(compressed) < len(body):
+            bodies[encoding] = compressed
+    headers = [
+        (header, value) for header, value in response.items()
+        if header not in SKIPPED_HEADERS
+    ]
+    return {'headers': headers, 'bodies': bodies}
+
+
+def choose_encoding(request, bodies):
+    accepted = accepted_encodings(request)
+    for encoding, _, _ in compressors():
+        if encoding in accepted and encoding in bodies:
+            return encoding
+    return 'identity'
+
+
+def apply_encoding(response, encoding, body):
+    response.content = body
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+    response['Content-Length'] = len(body)
+    return response
+
+
+class AnonymousPageCacheMiddleware:
+    """Кэш целых страниц для анонимных GET-запросов.
+
+    Работает до сессий, CSRF, аутентификации и шаблонов: при попадании
+    в кэш ответ собирается из сохранённых заголовков и заранее сжатого
+    тела (gzip, br - если установлен brotli) без единого запроса к БД.
+    Кэшируются только view, помеченные posts.cache.page_cache; ключ
+    строится из версий их областей, поэтому запись поста или
+    комментария (posts.signals) делает старые ответы недостижимыми.
+
+    Наличие cookie сессии считается признаком авторизации: такие
+    запросы, как и ответы со своими cookie, мимо кэша. Так же и с cookie
+    сообщений (django.contrib.messages): страница из кэша не показала
+    бы сообщение, и оно всплыло бы на следующей. Адреса с параметрами,
+    кроме курсоров страниц, тоже не кэшируются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        lookup = self.lookup(request)
+        if lookup is None:
+            return self.get_response(request)
+        key, versions = lookup
+        entry = cache.get(key)
+        if entry is not None:
+            return self.cached_response(request, entry)
+        with fresh_reads(*versions):
+            response = self.get_response(request)
+        if not self.is_cacheable(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding', 'Cookie'))
+        entry = build_entry(response)
+        cache.set(key, entry, PAGE_CACHE_TIMEOUT)
+        encoding = choose_encoding(request, entry['bodies'])
+        return apply_encoding(
+            response, encoding, entry['bodies'][encoding]
+        )
+
+    @staticmethod
+    def lookup(request):
+        if (request.method != 'GET'
+                or settings.SESSION_COOKIE_NAME in request.COOKIES
+                or CookieStorage.cookie_name in request.COOKIES
+                or not has_page_params_only(request)):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        scopes_func = getattr(match.func, 'page_cache_scopes', None)
+        if scopes_func is None:
+            return None
+        # MetricsMiddleware подписывает метрики по имени view и для
+        # ответов из кэша.
+        request.resolver_match = match
+        versions = request_scope_versions(
+            request, scopes_func(*match.args, **match.kwargs)
+        )
+        return response_key(versions, request), versions
+
+    @staticmethod
+    def is_cacheable(response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not response.has_header('Content-Encoding')
+            and 'private' not in response.get('Cache-Control', '')
+        )
+
+    @staticmethod
+    def cached_response(request, entry):
+        headers = dict(entry['headers'])
+        response = get_conditional_response(
+            request,
+            etag=headers.get('ETag'),
+            last_modified=parse_http_date_safe(
+                headers.get('Last-Modified', '')
+            ),
+        )
+        if response is not None:
+            for header in ('ETag', 'Last-Modified', 'Cache-Control', 'Vary'):
+                if header in headers:
+                    response[header] = headers[header]
+            return response
+        encoding = choose_encoding(request, entry['bodies'])
+        response = HttpResponse()
+        for header, value in entry['headers']:
+            response[header] = value
+        return apply_encoding(response, encoding, entry['bodies'][encoding])
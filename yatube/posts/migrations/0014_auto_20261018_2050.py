@@ -0,0 +1,54 @@
+# Generated by Django 2.2.19 on 2026-10-18 20:50
+
+from django.db import migrations, models
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+PREVIEW_LENGTH = 200
+
+
+def backfill_group_activity(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    latest = Post.objects.filter(group=OuterRef('pk')).order_by(
+        '-pub_date', '-id'
+    )
+    Group.objects.update(
+        last_post_at=Subquery(latest.values('pub_date')[:1]),
+        last_post_preview=Coalesce(
+            Subquery(
+                latest.annotate(
+                    preview=Substr('text', 1, PREVIEW_LENGTH)
+                ).values('preview')[:1],
+                output_field=CharField()
+            ),
+            Value('')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_auto_20261018_2038'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последний пост'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='last_post_preview',
+            field=models.CharField(blank=True, editable=False, max_length=200, verbose_name='Начало последнего поста'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['title'], name='posts_group_title_idx'),
+        ),
+        migrations.RunPython(
+            backfill_group_activity, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.19 on 2026-10-18 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_auto_20261018_2055'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheScope',
+            fields=[
+                ('name', models.CharField(max_length=200, primary_key=True, serialize=False, verbose_name='Область')),
+                ('version', models.BigIntegerField(verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'Версия области кэша',
+                'verbose_name_plural': 'Версии областей кэша',
+            },
+        ),
+    ]
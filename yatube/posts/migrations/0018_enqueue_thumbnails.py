@@ -0,0 +1,36 @@
+# Generated by Django 2.2.19 on 2026-10-18 21:20
+
+import json
+
+from django.db import migrations
+
+
+def enqueue_thumbnails(apps, schema_editor):
+    # Превью старых постов строит воркер (run_jobs), как и для новых:
+    # в миграции не открываем файлы картинок.
+    Post = apps.get_model('posts', 'Post')
+    Job = apps.get_model('core', 'Job')
+    Job.objects.bulk_create(
+        (
+            Job(
+                kind='posts.generate_thumbnails',
+                payload=json.dumps({'post_id': post_id})
+            )
+            for post_id in Post.objects.exclude(image='').filter(
+                thumbnails=''
+            ).values_list('pk', flat=True).iterator()
+        ),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('posts', '0017_cachescope'),
+    ]
+
+    operations = [
+        migrations.RunPython(enqueue_thumbnails, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,45 @@
-from django.db import models
+import json
+
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 from core.models import CreatedModel
+from .storage import post_images
 
 User = get_user_model()
 
+GROUP_PREVIEW_LENGTH = 200
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False
+    )
+    # Сведения о последнем посте для каталога групп; пересчитываются
+    # при записи постов группы (posts.counters.refresh_group_activity).
+    last_post_at = models.DateTimeField(
+        'Последний пост',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    last_post_preview = models.CharField(
+        'Начало последнего поста',
+        max_length=GROUP_PREVIEW_LENGTH,
+        blank=True,
+        editable=False
+    )
+
+    class Meta:
+        # Каталог листается по (title, id) через KeysetPaginator.
+        indexes = [
+            models.Index(fields=['title'], name='posts_group_title_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -43,19 +73,94 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=post_images,
+        blank=True,
+        db_index=True
     )
     # Аргумент upload_to указывает директорию,
     # в которую будут загружаться пользовательские файлы.
+    # Имя файла - хэш содержимого (posts.storage), индекс нужен для
+    # поиска постов с той же картинкой и для gc_media.
+    # Размеры и заглушка заполняются при загрузке (posts.images), чтобы
+    # ленты размечали картинку, не открывая файл.
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    image_placeholder = models.TextField(
+        'Заглушка картинки',
+        blank=True,
+        editable=False
+    )
+    # Готовые превью картинки в JSON: {вариант: {url, width, height}}.
+    thumbnails = models.TextField(
+        'Превью',
+        blank=True,
+        editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        # Под ленты группы и автора: фильтр по связи и сортировка
+        # по (-pub_date, -id), как в KeysetPaginator, без сортировки
+        # во временном B-дереве.
+        indexes = [
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='posts_post_group_feed_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='posts_post_author_feed_idx'
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[:15]
 
+    def thumbnail(self, variant):
+        return json.loads(self.thumbnails or '{}').get(variant)
+
+    @property
+    def card_thumbnail(self):
+        return self.thumbnail('card')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходные связи, чтобы при сохранении
+        # перенести счётчики со старой группы и автора на новые.
+        instance._loaded_values = {
+            name: instance.__dict__[name]
+            for name in ('author_id', 'group_id')
+            if name in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Счётчики обновляются в post_save, внутри этой же транзакции.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+        self._loaded_values = {
+            'author_id': self.author_id,
+            'group_id': self.group_id,
+        }
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -82,4 +187,94 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='posts_comment_post_idx'
+            ),
+        ]
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='prevent_self_follow'
+            ),
+        ]
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок пользователя, разложенный при публикации."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост'
+    )
+    # Копии полей поста: выборка ленты и отписка обходятся без JOIN.
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-id'],
+                name='posts_timeline_feed_idx'
+            ),
+        ]
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Лента подписок'
+
+
+class CacheScope(models.Model):
+    """Версия области кэша страниц (posts.cache).
+
+    Лежит в БД, а не в кэше: её видят все процессы, она не вытесняется
+    и меняется в одной транзакции с данными.
+    """
+    name = models.CharField('Область', max_length=200, primary_key=True)
+    version = models.BigIntegerField('Версия')
+
+    class Meta:
+        verbose_name = 'Версия области кэша'
+        verbose_name_plural = 'Версии областей кэша'
@@ -0,0 +1,105 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+SEARCH_LIMIT = 50
+SNIPPET_TOKENS = 24
+# Маркеры подсветки, которых не бывает в тексте: сниппет сначала
+# экранируется, и только потом маркеры превращаются в теги.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(query):
+    """Превращает ввод пользователя в безопасное выражение FTS5.
+
+    Каждое слово берётся в кавычки, поэтому операторы и спецсимволы
+    FTS5 из запроса не интерпретируются; слова объединяются через AND.
+    """
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+def reindex_posts(post_ids):
+    """Обновляет индекс для постов; удалённые посты из него пропадают."""
+    post_ids = list(post_ids)
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+            post_ids
+        )
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table} '
+            f'WHERE id IN ({placeholders})',
+            post_ids
+        )
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table}'
+        )
+
+
+def filter_posts(queryset, query):
+    """Оставляет в queryset посты, найденные по индексу."""
+    match = build_match_query(query)
+    if not match:
+        return queryset.none()
+    if not fts_enabled():
+        return queryset.filter(text__icontains=query)
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match,)
+    ))
+
+
+def _highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
+
+
+def search_posts(query, limit=SEARCH_LIMIT):
+    """Посты по убыванию релевантности (bm25) со сниппетами в .snippet."""
+    match = build_match_query(query)
+    if not match:
+        return []
+    if not fts_enabled():
+        posts = list(filter_posts(
+            Post.objects.select_related('author', 'group'), query
+        )[:limit])
+        for post in posts:
+            post.snippet = post.text[:200]
+        return posts
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, %s, %s) '
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY rank LIMIT %s',
+            [MATCH_START, MATCH_END, '…', SNIPPET_TOKENS, match, limit]
+        )
+        snippets = dict(cursor.fetchall())
+    posts = Post.objects.select_related('author', 'group').in_bulk(snippets)
+    results = []
+    for post_id, snippet in snippets.items():
+        if post_id in posts:
+            posts[post_id].snippet = _highlight(snippet)
+            results.append(posts[post_id])
+    return results
@@ -0,0 +1,179 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from core.jobs import enqueue
+
+from .cache import (
+    GROUPS_SCOPE, INDEX_SCOPE, group_scope, invalidate, post_scope,
+    post_scopes, profile_scope, user_scope
+)
+from .counters import (
+    change_comments_count, change_posts_count, refresh_group_activity
+)
+from .models import Comment, Follow, Group, Post, User
+
+# Поля пользователя, которые видны на закэшированных страницах.
+USER_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(post_save, sender=Post)
+def update_post_counters(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    if created:
+        change_posts_count(instance.author_id, instance.group_id)
+    else:
+        for field in ('author_id', 'group_id'):
+            old_value = loaded.get(field, getattr(instance, field))
+            new_value = getattr(instance, field)
+            if old_value != new_value:
+                change_posts_count(**{field: old_value}, delta=-1)
+                change_posts_count(**{field: new_value})
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    invalidate(post_scope(instance.pk), *post_scopes(
+        instance.author_id,
+        {instance.group_id, loaded.get('group_id')}
+    ))
+    if loaded.get('author_id') not in (None, instance.author_id):
+        invalidate(*post_scopes(loaded['author_id'], ()))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def update_group_activity(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    group_ids = {instance.group_id, loaded.get('group_id')} - {None}
+    if group_ids:
+        refresh_group_activity(group_ids)
+        invalidate(GROUPS_SCOPE)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_to_followers(sender, instance, created, **kwargs):
+    if created:
+        enqueue('posts.fan_out', post_id=instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def update_search_index(sender, instance, **kwargs):
+    enqueue('posts.reindex', post_id=instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def decrease_post_counters(sender, instance, **kwargs):
+    change_posts_count(instance.author_id, instance.group_id, delta=-1)
+    invalidate(
+        post_scope(instance.pk),
+        *post_scopes(instance.author_id, {instance.group_id})
+    )
+
+
+@receiver(post_save, sender=Comment)
+def increase_comments_count(sender, instance, created, **kwargs):
+    if created:
+        change_comments_count(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comments_count(sender, instance, **kwargs):
+    change_comments_count(instance.post_id, delta=-1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    # Карточки в лентах показывают число комментариев к посту.
+    post = Post.objects.filter(pk=instance.post_id).values(
+        'author_id', 'group_id'
+    ).first()
+    if post is not None:
+        invalidate(
+            post_scope(instance.post_id),
+            *post_scopes(post['author_id'], {post['group_id']})
+        )
+
+
+@receiver(pre_save, sender=User)
+def remember_user_names(sender, instance, using, update_fields=None,
+                        **kwargs):
+    instance._old_names = None
+    if update_fields is None or set(USER_NAME_FIELDS) & set(update_fields):
+        instance._old_names = User.objects.using(using).filter(
+            pk=instance.pk
+        ).values_list(*USER_NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, instance, created, **kwargs):
+    # Имя автора есть в карточках его постов, логин - в ссылках
+    # на профиль и в комментариях. Вход (last_login) страниц не меняет.
+    old_names = getattr(instance, '_old_names', None)
+    if created or old_names is None:
+        return
+    names = tuple(getattr(instance, field) for field in USER_NAME_FIELDS)
+    if names == old_names:
+        return
+    post_ids = {
+        *Post.objects.filter(author=instance).values_list('pk', flat=True),
+        *Comment.objects.filter(author=instance).values_list(
+            'post_id', flat=True
+        ),
+    }
+    slugs = Group.objects.filter(posts__author=instance).values_list(
+        'slug', flat=True
+    ).distinct()
+    old_username = old_names[USER_NAME_FIELDS.index('username')]
+    invalidate(
+        INDEX_SCOPE,
+        *{profile_scope(instance.username), profile_scope(old_username)},
+        *[group_scope(slug) for slug in slugs],
+        *[post_scope(post_id) for post_id in post_ids],
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follower_pages(sender, instance, **kwargs):
+    # Кнопка подписки на странице профиля зависит от читателя.
+    invalidate(user_scope(instance.user_id))
+
+
+def group_scopes(group, slugs):
+    # Ссылки на группу есть в карточках постов в общей ленте и профилях.
+    usernames = User.objects.filter(post__group=group).values_list(
+        'username', flat=True
+    ).distinct()
+    return [
+        INDEX_SCOPE,
+        GROUPS_SCOPE,
+        *[group_scope(slug) for slug in slugs if slug],
+        *[profile_scope(username) for username in usernames],
+    ]
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, **kwargs):
+    instance._old_slug = Group.objects.filter(pk=instance.pk).values_list(
+        'slug', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_pages(sender, instance, created, **kwargs):
+    if created:
+        invalidate(GROUPS_SCOPE)
+    else:
+        slugs = {instance.slug, instance._old_slug}
+        invalidate(*group_scopes(instance, slugs))
+
+
+@receiver(pre_delete, sender=Group)
+def invalidate_deleted_group_pages(sender, instance, **kwargs):
+    # До удаления: после него посты уже отвязаны от группы (SET_NULL).
+    invalidate(*group_scopes(instance, {instance.slug}))
@@ -0,0 +1,56 @@
+"""Хранилище картинок постов с именами по содержимому.
+
+Файл сохраняется как <каталог>/<ab>/<sha256><.ext>, где ab - первые
+два символа хэша (чтобы каталоги не разрастались). Повторная загрузка
+той же картинки даёт то же имя: файл не пишется второй раз, а превью
+sorl, чей ключ строится из имени исходника, переиспользуются.
+Удаляет ненужные файлы команда gc_media.
+"""
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def content_name(name, content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    hexdigest = digest.hexdigest()
+    extension = os.path.splitext(name)[1].lower()
+    return posixpath.join(
+        posixpath.dirname(name), hexdigest[:2], hexdigest + extension
+    )
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        return super().save(content_name(name, content), content, max_length)
+
+    def get_available_name(self, name, max_length=None):
+        # Одинаковое имя означает одинаковое содержимое: суффиксы не нужны.
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            # Свежая дата изменения защищает файл от gc_media, пока
+            # ссылающийся на него пост ещё не сохранён.
+            os.utime(self.path(name))
+            return name
+        # Пишем во временный файл и атомарно переименовываем: параллельная
+        # загрузка той же картинки не увидит недописанный файл.
+        temporary = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+
+post_images = ContentAddressedStorage()
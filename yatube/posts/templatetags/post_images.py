@@ -0,0 +1,74 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+# Первые карточки ленты видны без прокрутки и грузятся сразу,
+# остальные - лениво, по мере приближения к экрану.
+EAGER_CARDS = 2
+SIZES = '(min-width: 992px) 960px, 100vw'
+
+
+def _srcset(sources):
+    return ', '.join(
+        f'{source["url"]} {source["width"]}w' for source in sources
+    )
+
+
+def _size(width, height):
+    if not (width and height):
+        return ''
+    return format_html(' width="{}" height="{}"', width, height)
+
+
+@register.simple_tag(takes_context=True)
+def post_image(context, post, variant='card', css_class='card-img my-2'):
+    """<picture> с WebP/JPEG в нескольких ширинах по Post.thumbnails.
+
+    Внутри цикла по постам позиция берётся из forloop: карточки
+    ниже EAGER_CARDS получают loading="lazy". Пока превью нет (пост
+    старше превью или задача ещё в очереди), выводится оригинал.
+    """
+    # На странице создания поста переменной post нет вовсе.
+    if not post or not post.image:
+        return ''
+    forloop = context.get('forloop')
+    lazy = forloop is not None and forloop['counter0'] >= EAGER_CARDS
+    style = ''
+    if post.image_placeholder:
+        style = f'background: url({post.image_placeholder}) center / cover'
+    thumbnail = post.thumbnail(variant)
+    if thumbnail:
+        url, width, height = (
+            thumbnail['url'], thumbnail['width'], thumbnail['height']
+        )
+        sources = dict(thumbnail.get('sources', {}))
+    else:
+        url, width, height = (
+            post.image.url, post.image_width, post.image_height
+        )
+        sources = {}
+    fallback = sources.pop('image/jpeg', None)
+    image = format_html(
+        '<img class="{}" src="{}"{}{} loading="{}" decoding="async"{}>',
+        css_class,
+        url,
+        format_html(' srcset="{}" sizes="{}"', _srcset(fallback), SIZES)
+        if fallback else '',
+        _size(width, height),
+        'lazy' if lazy else 'eager',
+        format_html(' style="{}"', style) if style else '',
+    )
+    if not sources:
+        return image
+    return format_html(
+        '<picture>{}{}</picture>',
+        format_html_join(
+            '', '<source type="{}" srcset="{}" sizes="{}">',
+            (
+                (mime_type, _srcset(items), SIZES)
+                for mime_type, items in sources.items()
+            )
+        ),
+        image,
+    )
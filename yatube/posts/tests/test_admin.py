@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.admin import COUNT_LIMIT, EstimatedCountPaginator
+from posts.models import Group, Post, User
+
+CHANGELIST = reverse('admin:posts_post_changelist')
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='test_title', slug='test-slug', description='description'
+        )
+        for year, month in ((2019, 3), (2021, 7), (2021, 11)):
+            post = Post.objects.create(
+                text=f'post {year}-{month}', author=cls.admin, group=cls.group
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.make_aware(datetime(year, month, 15))
+            )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.client.get(CHANGELIST)
+        with self.assertNumQueries(9) as context:
+            self.client.get(CHANGELIST)
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('COUNT(*)', sql)
+        self.assertNotIn('DISTINCT', sql)
+        for number in range(10):
+            post = Post.objects.create(
+                text='more', author=self.admin, group=Group.objects.create(
+                    title=f'group {number}', slug=f'group-{number}'
+                )
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.make_aware(datetime(2021, 7, 1))
+            )
+        with self.assertNumQueries(9):
+            self.client.get(CHANGELIST)
+
+    def test_group_uses_autocomplete_widget(self):
+        response = self.client.get(CHANGELIST)
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertContains(
+            response,
+            f'<option value="{self.group.pk}" selected>test_title</option>',
+            count=3
+        )
+
+    def test_year_and_month_filters(self):
+        response = self.client.get(CHANGELIST)
+        self.assertContains(response, '?year=2021')
+        self.assertContains(response, '?year=2019')
+        self.assertNotContains(response, '?year=2020')
+        response = self.client.get(CHANGELIST, {'year': '2021'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertContains(response, 'month=11')
+        self.assertNotContains(response, 'month=3')
+        response = self.client.get(CHANGELIST, {'year': '2021', 'month': '7'})
+        self.assertEqual(
+            [post.text for post in response.context['cl'].result_list],
+            ['post 2021-7']
+        )
+
+    def test_invalid_dates_are_ignored(self):
+        for params, count in (
+            ({'year': '0'}, 3),
+            ({'year': '9999', 'month': '12'}, 3),
+            ({'year': '2021', 'month': '13'}, 2),
+            ({'year': '2021', 'month': '0'}, 2),
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(CHANGELIST, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['cl'].result_count, count)
+
+    def test_estimate_is_clamped_by_last_page(self):
+        for _ in range(5):
+            Post.objects.create(text='deleted', author=self.admin).delete()
+        Post.objects.create(text='last', author=self.admin)
+        posts = Post.objects.order_by('pk')
+        paginator = EstimatedCountPaginator(posts, 3)
+        self.assertEqual(paginator.num_pages, 3)
+        self.assertEqual(len(paginator.page(2)), 1)
+        self.assertEqual((paginator.count, paginator.num_pages), (4, 2))
+        paginator = EstimatedCountPaginator(posts, 3)
+        self.assertEqual(len(paginator.page(3)), 0)
+        self.assertEqual((paginator.count, paginator.num_pages), (4, 2))
+
+    def test_estimated_count(self):
+        posts = Post.objects.all()
+        self.assertEqual(
+            EstimatedCountPaginator(posts, 10).count,
+            posts.order_by('-pk').first().pk
+        )
+        filtered = posts.filter(text__startswith='post')
+        self.assertEqual(EstimatedCountPaginator(filtered, 10).count, 3)
+        self.assertGreater(COUNT_LIMIT, 3)
+
+    def test_change_form_and_group_changelist(self):
+        post = Post.objects.first()
+        for address in (
+            reverse('admin:posts_post_change', args=(post.pk,)),
+            reverse('admin:posts_post_add'),
+            reverse('admin:posts_group_changelist'),
+        ):
+            with self.subTest(address=address):
+                self.assertEqual(self.client.get(address).status_code, 200)
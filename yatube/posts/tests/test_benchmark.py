@@ -0,0 +1,79 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.benchmark import percentile
+from posts.images import EXTENSION
+from posts.models import Comment, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, JOBS_SYNC=True)
+class BenchmarkSeedTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed_command_creates_data(self):
+        call_command(
+            'seed_benchmark_data', users=3, groups=2, posts=20,
+            comments=30, images=2, stdout=StringIO()
+        )
+        self.assertEqual(
+            User.objects.filter(username__startswith='bench_user_').count(), 3
+        )
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertEqual(
+            sum(Post.objects.values_list('comments_count', flat=True)), 30
+        )
+
+    def seeded_posts(self):
+        call_command('seed_benchmark_data', users=2, groups=1, posts=5,
+                     comments=0, images=0, stdout=StringIO())
+        return list(Post.objects.order_by('pk').values_list(
+            'text', 'author__username', 'group__slug', 'pub_date'
+        ))
+
+    def test_seed_is_reproducible(self):
+        first = self.seeded_posts()
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        User.objects.all().delete()
+        self.assertEqual(self.seeded_posts(), first)
+
+    def test_seed_ignores_existing_data(self):
+        first = self.seeded_posts()
+        second = self.seeded_posts()[len(first):]
+        # Новые авторы и группы - со следующими номерами.
+        self.assertEqual(
+            [(text, date) for text, _, _, date in second],
+            [(text, date) for text, _, _, date in first]
+        )
+        self.assertEqual(
+            {username for _, username, _, _ in second},
+            {'bench_user_2', 'bench_user_3'}
+        )
+
+    def test_seed_images_are_normalized(self):
+        call_command(
+            'seed_benchmark_data', users=1, groups=1, posts=20,
+            comments=0, images=1, stdout=StringIO()
+        )
+        post = Post.objects.exclude(image='').first()
+        self.assertTrue(post.image.name.endswith(EXTENSION))
+        self.assertEqual((post.image_width, post.image_height), (1200, 800))
+        self.assertTrue(post.image_placeholder)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
@@ -0,0 +1,304 @@
+import gzip
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db.models import F
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts.cache import INDEX_SCOPE, invalidate, post_scope
+from posts.models import CacheScope, Comment, Group, Post, User
+
+INDEX = reverse('posts:index')
+# Из кэша страница отдаётся за один запрос - версии областей кэша.
+VERSION_QUERIES = 1
+
+
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='test_title',
+            description='test_description',
+            slug='test-slug'
+        )
+        cls.another_group = Group.objects.create(
+            title='another_title',
+            description='another_description',
+            slug='another-slug'
+        )
+        cls.post = Post.objects.create(
+            text='cached_post', author=cls.author, group=cls.group
+        )
+        cls.group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug}
+        )
+        cls.another_group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.another_group.slug}
+        )
+        cls.profile_url = reverse(
+            'posts:profile', kwargs={'username': cls.author.username}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_anonymous_page_is_cached(self):
+        first = self.client.get(INDEX)
+        Post.objects.filter(pk=self.post.pk).update(text='changed_in_db')
+        with self.assertNumQueries(VERSION_QUERIES):
+            second = self.client.get(INDEX)
+        self.assertEqual(first.content, second.content)
+
+    def test_authorized_page_is_not_cached(self):
+        self.authorized_client.get(INDEX)
+        Post.objects.filter(pk=self.post.pk).update(text='changed_in_db')
+        response = self.authorized_client.get(INDEX)
+        self.assertContains(response, 'changed_in_db')
+
+    def test_post_create_invalidates_affected_pages(self):
+        for address in (INDEX, self.group_url, self.profile_url,
+                        self.another_group_url):
+            self.client.get(address)
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'fresh_post', 'group': self.group.pk}
+        )
+        for address in (INDEX, self.group_url, self.profile_url):
+            with self.subTest(address=address):
+                self.assertContains(self.client.get(address), 'fresh_post')
+        with self.assertNumQueries(VERSION_QUERIES):
+            self.client.get(self.another_group_url)
+
+    def test_post_edit_moves_post_between_groups(self):
+        self.client.get(self.group_url)
+        self.client.get(self.another_group_url)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'edited_post', 'group': self.another_group.pk}
+        )
+        self.assertNotContains(self.client.get(self.group_url), 'edited_post')
+        self.assertContains(
+            self.client.get(self.another_group_url), 'edited_post'
+        )
+
+    def test_author_rename_invalidates_pages(self):
+        detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        addresses = (INDEX, self.group_url, self.profile_url, detail_url)
+        for address in addresses:
+            self.client.get(address)
+        # Вход обновляет last_login, но страниц не меняет.
+        Client().force_login(self.author)
+        with self.assertNumQueries(VERSION_QUERIES):
+            self.client.get(INDEX)
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name, author.last_name = 'Новое', 'Имя'
+        author.save()
+        for address in addresses:
+            with self.subTest(address=address):
+                self.assertContains(self.client.get(address), 'Новое Имя')
+
+    def test_versions_live_in_database(self):
+        etag = self.client.get(INDEX)['ETag']
+        # Другой процесс со своим кэшем или вытеснение ключей.
+        cache.clear()
+        self.assertEqual(self.client.get(INDEX)['ETag'], etag)
+        # Запись в другом процессе видна через БД.
+        CacheScope.objects.filter(name=INDEX_SCOPE).update(
+            version=F('version') + 1
+        )
+        with self.assertNumQueries(VERSION_QUERIES + 1):
+            response = self.client.get(INDEX)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_comment_invalidates_post_pages(self):
+        self.client.get(INDEX)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='comment'
+        )
+        self.assertContains(self.client.get(INDEX), 'Комментариев: 1')
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='test_title',
+            description='test_description',
+            slug='test-slug'
+        )
+        cls.addresses = (
+            INDEX,
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='conditional_post', author=self.author, group=self.group
+        )
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    @staticmethod
+    def age_versions():
+        """Последние записи в области были пару секунд назад."""
+        CacheScope.objects.update(version=F('version') - 2 * 10 ** 9)
+
+    def test_unchanged_pages_are_not_modified(self):
+        self.age_versions()
+        for address in (*self.addresses, self.detail_url):
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertIn('Last-Modified', response)
+                with self.assertNumQueries(VERSION_QUERIES):
+                    response = self.client.get(
+                        address, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        self.age_versions()
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='new_comment'
+        )
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertContains(response, 'new_comment')
+
+    def test_no_last_modified_within_write_second(self):
+        # Пост создан только что: правка в ту же секунду не сдвинула бы
+        # дату, поэтому проверка только по ETag.
+        response = self.client.get(self.detail_url)
+        self.assertNotIn('Last-Modified', response)
+        Post.objects.filter(pk=self.post.pk).update(text='edited_post')
+        invalidate(post_scope(self.post.pk))
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+        self.assertContains(response, 'edited_post')
+
+    def test_post_edit_changes_validators(self):
+        etags = {
+            address: self.client.get(address)['ETag']
+            for address in (*self.addresses, self.detail_url)
+        }
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'edited_post', 'group': self.group.pk}
+        )
+        for address, etag in etags.items():
+            with self.subTest(address=address):
+                response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'edited_post')
+
+    def test_comment_changes_post_validator(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.author, text='new_comment'
+        )
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'new_comment')
+
+    def test_validator_depends_on_user(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        response = self.authorized_client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_changes_profile_validator(self):
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        profile_url = self.addresses[2]
+        etag = reader_client.get(profile_url)['ETag']
+        reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        response = reader_client.get(profile_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='cached_post', author=cls.author)
+        cls.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hit_serves_precompressed_body(self):
+        first = self.client.get(INDEX, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        with self.assertNumQueries(VERSION_QUERIES):
+            second = self.client.get(INDEX, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIsNone(second.context)
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second['Vary'], 'Cookie, Accept-Encoding')
+        self.assertEqual(second.content, first.content)
+        self.assertIn(b'cached_post', gzip.decompress(second.content))
+        plain = self.client.get(INDEX)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(plain.content, gzip.decompress(second.content))
+
+    def test_hit_answers_not_modified(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        with self.assertNumQueries(VERSION_QUERIES):
+            response = self.client.get(
+                self.detail_url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_session_cookie_bypasses_cache(self):
+        self.client.get(self.detail_url)
+        Post.objects.filter(pk=self.post.pk).update(text='changed_in_db')
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = 'anything'
+        self.assertContains(self.client.get(self.detail_url), 'changed_in_db')
+
+    def test_messages_cookie_bypasses_cache(self):
+        self.client.get(self.detail_url)
+        Post.objects.filter(pk=self.post.pk).update(text='changed_in_db')
+        self.client.cookies[CookieStorage.cookie_name] = 'anything'
+        self.assertContains(self.client.get(self.detail_url), 'changed_in_db')
+
+    def test_unknown_params_are_not_cached(self):
+        for params in ({'utm_source': 'mail'}, {'after': ['a', 'b']}):
+            self.client.get(INDEX, params)
+            self.assertIsNotNone(self.client.get(INDEX, params).context)
+        self.client.get(INDEX, {'after': 'cursor'})
+        self.assertIsNone(self.client.get(INDEX, {'after': 'cursor'}).context)
+
+    def test_comment_invalidates_post_detail(self):
+        self.client.get(self.detail_url)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='new_comment'
+        )
+        self.assertContains(self.client.get(self.detail_url), 'new_comment')
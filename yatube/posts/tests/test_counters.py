@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Group, Post, User
+from users.models import Profile
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.group = Group.objects.create(
+            title='test_title',
+            description='test_description',
+            slug='test-slug'
+        )
+        self.another_group = Group.objects.create(
+            title='another_title',
+            description='another_description',
+            slug='another-slug'
+        )
+
+    def assert_counters(self, group=0, another_group=0, author=0):
+        self.group.refresh_from_db()
+        self.another_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.another_group.posts_count, another_group)
+        self.assertEqual(
+            Profile.objects.get(user=self.author).posts_count, author
+        )
+
+    def test_post_create_and_delete(self):
+        post = Post.objects.create(
+            text='text', author=self.author, group=self.group
+        )
+        self.assert_counters(group=1, author=1)
+        post.delete()
+        self.assert_counters(group=0, author=0)
+
+    def test_post_group_change(self):
+        post = Post.objects.create(
+            text='text', author=self.author, group=self.group
+        )
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.another_group
+        post.save()
+        post.save()
+        self.assert_counters(group=0, another_group=1, author=1)
+
+    def test_group_delete_sets_null(self):
+        post = Post.objects.create(
+            text='text', author=self.author, group=self.group
+        )
+        self.group.delete()
+        post = Post.objects.get(pk=post.pk)
+        self.assertIsNone(post.group)
+        post.group = self.another_group
+        post.save()
+        self.another_group.refresh_from_db()
+        self.assertEqual(self.another_group.posts_count, 1)
+
+    def test_comments_count(self):
+        post = Post.objects.create(text='text', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='comment'
+        )
+        Comment.objects.create(post=post, author=self.author, text='comment')
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_rebuild_counters_command(self):
+        post = Post.objects.create(
+            text='text', author=self.author, group=self.group
+        )
+        Comment.objects.create(post=post, author=self.author, text='comment')
+        Post.objects.update(comments_count=10)
+        Group.objects.update(posts_count=10)
+        Profile.objects.all().delete()
+        call_command('rebuild_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assert_counters(group=1, author=1)
+
+    def test_stale_counter_does_not_go_below_zero(self):
+        # Как на данных до появления счётчиков: поле ещё 0.
+        post = Post.objects.create(text='text', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='comment'
+        )
+        Post.objects.update(comments_count=0)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_profile_is_created_with_user(self):
+        user = User.objects.create_user(username='new_user')
+        self.assertEqual(Profile.objects.get(user=user).posts_count, 0)
+
+    def test_delete_user_with_posts_and_comments(self):
+        user = User.objects.create_user(username='leaving')
+        post = Post.objects.create(text='text', author=user, group=self.group)
+        Comment.objects.create(post=post, author=user, text='comment')
+        other_post = Post.objects.create(text='text', author=self.author)
+        Comment.objects.create(post=other_post, author=user, text='comment')
+        user.delete()
+        self.assertFalse(Profile.objects.filter(user_id=user.pk).exists())
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+        other_post.refresh_from_db()
+        self.assertEqual(other_post.comments_count, 0)
+        self.assert_counters(group=0, author=1)
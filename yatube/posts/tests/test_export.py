@@ -0,0 +1,90 @@
+import csv
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='test_title',
+            description='test_description',
+            slug='test-slug'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'text, "{number}"', author=cls.author, group=cls.group
+            )
+            for number in range(3)
+        ]
+        cls.other = User.objects.create_user(username='other')
+        Post.objects.create(text='other', author=cls.other)
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def test_profile_export_streams_json(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse(
+            'posts:profile_export', kwargs={'username': 'author'}
+        ))
+        self.assertTrue(response.streaming)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(
+            [row['id'] for row in rows], [post.pk for post in self.posts]
+        )
+        self.assertEqual(rows[0]['group'], 'test-slug')
+
+    def test_group_export_streams_csv(self):
+        response = self.client.get(
+            reverse('posts:group_export', kwargs={'slug': 'test-slug'}),
+            {'format': 'csv'}
+        )
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(
+            [row['text'] for row in rows],
+            [post.text for post in self.posts]
+        )
+
+    def test_export_access(self):
+        group_url = reverse('posts:group_export', kwargs={'slug': 'test-slug'})
+        profile_url = reverse(
+            'posts:profile_export', kwargs={'username': 'author'}
+        )
+        self.client.logout()
+        for url in (group_url, profile_url):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 302)
+                self.assertTrue(response.url.startswith(reverse('login')))
+        self.client.force_login(self.other)
+        for url in (group_url, profile_url):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_unknown_format(self):
+        response = self.client.get(
+            reverse('posts:group_export', kwargs={'slug': 'test-slug'}),
+            {'format': 'xml'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_command(self):
+        output = StringIO()
+        call_command(
+            'export_posts', '--group', 'test-slug', format='jsonl',
+            stdout=output
+        )
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])['author'], 'author')
@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry, User
+
+FOLLOW_INDEX = reverse('posts:follow_index')
+
+
+@override_settings(JOBS_SYNC=True)
+class FollowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.old_post = Post.objects.create(text='old_post', author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow(self):
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author.username}
+        ))
+
+    def feed(self, **params):
+        return self.reader_client.get(FOLLOW_INDEX, params).context['page_obj']
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        self.follow()
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author
+        ).exists())
+        new_post = Post.objects.create(text='new_post', author=self.author)
+        Post.objects.create(text='other_post', author=self.stranger)
+        self.assertEqual(list(self.feed()), [new_post, self.old_post])
+
+    def test_unfollow_clears_timeline(self):
+        self.follow()
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}
+        ))
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(list(self.feed()), [])
+
+    def test_cannot_follow_self(self):
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.reader.username}
+        ))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_timeline_is_paginated_by_cursor(self):
+        self.follow()
+        for number in range(12):
+            Post.objects.create(text=f'post{number}', author=self.author)
+        first_page = self.feed()
+        second_page = self.feed(after=first_page.next_cursor)
+        self.assertEqual(len(first_page), 10)
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(set(first_page) & set(second_page))
+
+    def test_backfill_command(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        call_command('backfill_timeline', user='reader', stdout=StringIO())
+        self.assertEqual(list(self.feed()), [self.old_post])
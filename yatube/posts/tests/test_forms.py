@@ -1,11 +1,28 @@
+import shutil
+import tempfile
 from http import HTTPStatus
+from io import BytesIO
 
-from django.test import Client, TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
+from posts.images import EXTENSION, IMAGE_MAX_SIZE
 from posts.models import Group, Post, User
 
 POST_CREATE = reverse('posts:post_create')
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 class PostFormTest(TestCase):
@@ -116,3 +133,126 @@ class PostFormTest(TestCase):
 
         self.assertEqual(last_post.text, form_data['text'])
         self.assertEqual(last_post.author, self.author)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, JOBS_SYNC=True)
+class PostImageFormTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='NoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_create_post_generates_thumbnails(self):
+        """Превью создаются при загрузке и показываются без sorl."""
+        self.authorized_client.post(POST_CREATE, data={
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        })
+        post = Post.objects.get(text='Пост с картинкой')
+        thumbnail = post.card_thumbnail
+        self.assertEqual(
+            (thumbnail['width'], thumbnail['height']), (960, 339)
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, thumbnail['url'])
+
+    @override_settings(JOBS_SYNC=False)
+    def test_original_image_until_thumbnails_are_ready(self):
+        """Пока задача превью в очереди, лента показывает оригинал."""
+        self.authorized_client.post(POST_CREATE, data={
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        })
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertEqual(post.thumbnails, '')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(
+            response, f'src="{post.image.url}" width="2" height="1"'
+        )
+
+    def test_upload_is_normalized(self):
+        """Картинка уменьшается, перекодируется и теряет EXIF."""
+        exif = Image.Exif()
+        exif[0x0110] = 'Camera'
+        exif[0x0112] = 6  # Повёрнута на 90 градусов.
+        source = BytesIO()
+        Image.new('RGB', (3000, 2000), 'red').save(
+            source, 'JPEG', exif=exif.tobytes()
+        )
+        self.authorized_client.post(POST_CREATE, data={
+            'text': 'Большая картинка',
+            'image': SimpleUploadedFile(
+                name='photo.jpg',
+                content=source.getvalue(),
+                content_type='image/jpeg'
+            ),
+        })
+        post = Post.objects.get(text='Большая картинка')
+        self.assertTrue(post.image.name.endswith(EXTENSION))
+        expected = (IMAGE_MAX_SIZE[1] * 2 // 3, IMAGE_MAX_SIZE[1])
+        self.assertEqual((post.image_width, post.image_height), expected)
+        self.assertTrue(post.image_placeholder.startswith('data:image/'))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, expected)
+            self.assertFalse(stored.getexif())
+
+    def test_clearing_image_resets_dimensions(self):
+        self.authorized_client.post(POST_CREATE, data={
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        })
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': 'Без картинки', 'image-clear': 'on'}
+        )
+        post.refresh_from_db()
+        self.assertFalse(post.image)
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_placeholder, '')
+
+    def test_responsive_variants(self):
+        """Превью есть в WebP и JPEG нескольких ширин, лента их выводит."""
+        for number in range(3):
+            self.authorized_client.post(POST_CREATE, data={
+                'text': f'Пост {number}',
+                'image': SimpleUploadedFile(
+                    name='small.gif', content=SMALL_GIF,
+                    content_type='image/gif'
+                ),
+            })
+        post = Post.objects.get(text='Пост 0')
+        card = post.card_thumbnail
+        self.assertEqual(
+            [source['width'] for source in card['sources']['image/webp']],
+            [480, 960, 1440]
+        )
+        self.assertTrue(
+            card['sources']['image/webp'][0]['url'].endswith('.webp')
+        )
+        # Оригинал 2x1 без upscale даёт одно превью детальной страницы.
+        self.assertEqual(
+            len(post.thumbnail('detail')['sources']['image/jpeg']), 1
+        )
+        content = self.client.get(reverse('posts:index')).content.decode()
+        self.assertIn('<source type="image/webp" srcset="', content)
+        self.assertIn('1440w', content)
+        self.assertEqual(content.count('loading="eager"'), 2)
+        self.assertEqual(content.count('loading="lazy"'), 1)
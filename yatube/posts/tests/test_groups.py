@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.counters import rebuild_counters
+from posts.models import Group, Post, User
+from posts.tests.mixins import QueryBudgetMixin
+from posts.views import GROUPS_PER_PAGE
+
+GROUP_INDEX = reverse('posts:group_index')
+
+
+class GroupIndexTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(
+            title='Б-группа', slug='b-group', description='description'
+        )
+        self.another_group = Group.objects.create(
+            title='А-группа', slug='a-group', description='description'
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def create_post(self, text, group=None):
+        return Post.objects.create(
+            text=text, author=self.author, group=group or self.group
+        )
+
+    def test_page_lists_groups_by_title(self):
+        self.create_post('older_post')
+        self.create_post('latest_post')
+        response = self.client.get(GROUP_INDEX)
+        groups = list(response.context['page_obj'])
+        self.assertEqual(groups, [self.another_group, self.group])
+        self.assertEqual(groups[1].posts_count, 2)
+        self.assertContains(response, 'latest_post')
+        self.assertNotContains(response, 'older_post')
+
+    def test_activity_follows_post_writes(self):
+        first = self.create_post('first_post')
+        second = self.create_post('second_post')
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.last_post_preview, 'second_post')
+        self.assertEqual(self.group.last_post_at, second.pub_date)
+
+        second.text = 'edited_post'
+        second.save()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.last_post_preview, 'edited_post')
+
+        second.group = self.another_group
+        second.save()
+        self.group.refresh_from_db()
+        self.another_group.refresh_from_db()
+        self.assertEqual(self.group.last_post_preview, 'first_post')
+        self.assertEqual(self.another_group.last_post_preview, 'edited_post')
+
+        first.delete()
+        self.group.refresh_from_db()
+        self.assertIsNone(self.group.last_post_at)
+        self.assertEqual(self.group.last_post_preview, '')
+
+    def test_rebuild_counters_fills_activity(self):
+        post = self.create_post('x' * 500)
+        Group.objects.update(last_post_at=None, last_post_preview='')
+        rebuild_counters()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.last_post_at, post.pub_date)
+        self.assertEqual(len(self.group.last_post_preview), 200)
+
+    def test_query_budget_does_not_grow_with_groups(self):
+        Group.objects.bulk_create(
+            Group(title=f'group {number}', slug=f'group-{number}',
+                  description='', last_post_at=timezone.now()
+                  - timedelta(minutes=number), last_post_preview='preview')
+            for number in range(GROUPS_PER_PAGE * 2)
+        )
+        with self.assertQueryBudget(4):
+            response = self.authorized_client.get(GROUP_INDEX)
+        self.assertEqual(len(response.context['page_obj']), GROUPS_PER_PAGE)
+        self.assertTrue(response.context['page_obj'].has_next())
+
+    def test_page_is_cached_and_invalidated(self):
+        self.client.get(GROUP_INDEX)
+        with self.assertNumQueries(1):
+            self.client.get(GROUP_INDEX)
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'fresh_post', 'group': self.group.pk}
+        )
+        self.assertContains(self.client.get(GROUP_INDEX), 'fresh_post')
+        Group.objects.create(title='В-группа', slug='c-group')
+        self.assertContains(self.client.get(GROUP_INDEX), 'В-группа')
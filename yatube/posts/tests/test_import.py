@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.importer import keep_dates
+from posts.models import Comment, Group, Post, User
+from posts.search import search_posts
+from users.models import Profile
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def import_file(self, content, suffix, **options):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        output = StringIO()
+        try:
+            call_command('import_posts', path, stdout=output, **options)
+        finally:
+            os.remove(path)
+        return output.getvalue()
+
+    def test_import_jsonl(self):
+        records = [
+            {'type': 'group', 'slug': 'imported', 'title': 'Импорт'},
+            {'type': 'post', 'id': 100, 'author': 'author',
+             'group': 'imported', 'text': 'импортированный пост',
+             'pub_date': '2020-01-02T03:04:05+00:00'},
+            {'type': 'post', 'author': 'newcomer', 'text': 'от новичка'},
+            {'type': 'comment', 'post': 100, 'author': 'author',
+             'text': 'комментарий'},
+        ]
+        self.import_file(
+            '\n'.join(json.dumps(record) for record in records), '.jsonl',
+            batch_size=2, create_users=True
+        )
+        post = Post.objects.get(pk=100)
+        self.assertEqual(post.group.slug, 'imported')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(Group.objects.get(slug='imported').posts_count, 1)
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertTrue(
+            Post.objects.filter(author__username='newcomer').exists()
+        )
+        self.assertEqual(search_posts('импортированный'), [post])
+
+    def test_import_csv_skips_unknown_authors(self):
+        self.import_file(
+            'type,author,text\n'
+            'post,author,пост из csv\n'
+            'post,ghost,пропущен\n',
+            '.csv'
+        )
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)), ['пост из csv']
+        )
+        self.assertEqual(Profile.objects.get(user=self.author).posts_count, 1)
+
+    def test_existing_ids_are_reported_as_skipped(self):
+        content = '\n'.join(json.dumps(record) for record in [
+            {'type': 'post', 'id': 100, 'author': 'author', 'text': 'пост'},
+            {'type': 'post', 'id': 100, 'author': 'author', 'text': 'дубль'},
+        ])
+        self.assertIn('post: 1,', self.import_file(content, '.jsonl'))
+        output = self.import_file(content, '.jsonl')
+        self.assertIn('post: 0,', output)
+        self.assertIn('пропущено: 2', output)
+        self.assertEqual(Post.objects.get().text, 'пост')
+
+    def test_keep_dates_restores_auto_now_add_on_error(self):
+        field = Post._meta.get_field('pub_date')
+        with self.assertRaises(ValueError):
+            with keep_dates(field):
+                self.assertFalse(field.auto_now_add)
+                raise ValueError
+        self.assertTrue(field.auto_now_add)
+        self.assertIsNotNone(
+            Post.objects.create(text='пост', author=self.author).pub_date
+        )
@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+from posts.tests.mixins import QueryBudgetMixin
+
+POSTS_ON_PAGE = 10
+
+
+class FeedQueryBudgetTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test_title',
+            description='test_description',
+            slug='test-slug'
+        )
+        cls.author = User.objects.create_user(username='author')
+        for number in range(POSTS_ON_PAGE + 1):
+            author = User.objects.create_user(username=f'user{number}')
+            post = Post.objects.create(
+                text=f'text{number}',
+                author=cls.author if number % 2 else author,
+                group=cls.group,
+            )
+        for number in range(POSTS_ON_PAGE):
+            Comment.objects.create(
+                post=post,
+                author=User.objects.get(username=f'user{number}'),
+                text=f'comment{number}',
+            )
+        cls.post = post
+
+    def setUp(self):
+        cache.clear()
+
+    def test_views_stay_within_query_budget(self):
+        """Число запросов не зависит от количества постов на странице."""
+        # Первый запрос каждой страницы - версии областей кэша.
+        budgets = {
+            reverse('posts:index'): 2,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}): 3,
+            reverse('posts:profile', kwargs={'username': self.author}): 3,
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}): 3,
+        }
+        for address, budget in budgets.items():
+            with self.subTest(address=address):
+                with self.assertQueryBudget(budget):
+                    self.client.get(address)
+
+    def test_budget_violation_fails(self):
+        with self.assertRaises(AssertionError):
+            with self.assertQueryBudget(0):
+                User.objects.count()
+
+
+class QueryPlanTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент не сканируют таблицы и не сортируют во временных."""
+        call_command('check_query_plans', stdout=StringIO())
@@ -0,0 +1,58 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.search import FTS_TABLE, filter_posts, search_posts
+
+SEARCH = reverse('posts:search')
+
+
+@override_settings(JOBS_SYNC=True)
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            text='Утренняя <b>прогулка</b> по парку', author=cls.author
+        )
+        cls.relevant_post = Post.objects.create(
+            text='прогулка, прогулка и снова прогулка', author=cls.author
+        )
+        Post.objects.create(text='Вечерний чай', author=cls.author)
+
+    def test_results_are_ranked_with_snippets(self):
+        results = search_posts('прогулка')
+        self.assertEqual(results, [self.relevant_post, self.post])
+        self.assertIn('<mark>прогулка</mark>', results[1].snippet)
+        self.assertIn('&lt;b&gt;', results[1].snippet)
+
+    def test_index_follows_edit_and_delete(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Прогулка отменена, идём в кино'
+        post.save()
+        self.assertEqual(search_posts('кино'), [post])
+        self.assertEqual(search_posts('парку'), [])
+        post.delete()
+        self.assertEqual(search_posts('кино'), [])
+
+    def test_operators_in_query_are_not_interpreted(self):
+        self.assertEqual(search_posts('NOT "чай" OR *'), [])
+        response = self.client.get(SEARCH, {'q': 'чай)('})
+        self.assertContains(response, 'Вечерний')
+
+    def test_admin_search_uses_index(self):
+        found = filter_posts(Post.objects.all(), 'вечерний')
+        self.assertEqual(list(found.values_list('text', flat=True)),
+                         ['Вечерний чай'])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        self.assertEqual(search_posts('чай'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(search_posts('чай')), 1)
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.models import Post, User
+from posts.storage import post_images
+from posts.thumbnails import generate_thumbnails
+from posts.tests.test_forms import SMALL_GIF
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def upload(name='small.gif', content=SMALL_GIF):
+    return SimpleUploadedFile(
+        name=name, content=content, content_type='image/gif'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, image):
+        return Post.objects.create(
+            text='text', author=self.author, image=image
+        )
+
+    def test_same_content_is_stored_once(self):
+        first = self.create_post(upload('first.GIF'))
+        second = self.create_post(upload('second.gif'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name, r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.gif$'
+        )
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(
+            os.listdir(directory), [os.path.basename(first.image.path)]
+        )
+
+    def test_different_content_gets_different_name(self):
+        name = post_images.save('posts/a.txt', ContentFile(b'a'))
+        other = post_images.save('posts/a.txt', ContentFile(b'b'))
+        self.assertNotEqual(name, other)
+        with post_images.open(other) as stored:
+            self.assertEqual(stored.read(), b'b')
+
+    def test_thumbnails_are_shared(self):
+        first = self.create_post(upload())
+        generate_thumbnails(first)
+        second = self.create_post(upload('copy.gif'))
+        with self.assertNumQueries(5):
+            # Поиск готовых превью, их запись, сброс версий областей кэша
+            # и ничего от sorl.
+            thumbnails = generate_thumbnails(second)
+        self.assertEqual(thumbnails, json.loads(first.thumbnails))
+
+    def test_gc_media_deletes_unreferenced_files(self):
+        kept = self.create_post(upload())
+        orphan = post_images.save('posts/orphan.gif', ContentFile(b'orphan'))
+        fresh = post_images.save('posts/fresh.gif', ContentFile(b'fresh'))
+        old = time.time() - 7200
+        for name in (kept.image.name, orphan):
+            os.utime(post_images.path(name), (old, old))
+
+        call_command('gc_media', '--dry-run', stdout=StringIO())
+        self.assertTrue(post_images.exists(orphan))
+
+        call_command('gc_media', stdout=StringIO())
+        self.assertTrue(post_images.exists(kept.image.name))
+        self.assertTrue(post_images.exists(fresh))
+        self.assertFalse(post_images.exists(orphan))
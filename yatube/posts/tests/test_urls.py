@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 
@@ -25,6 +26,7 @@ class PostModelTest(TestCase):
         cls.user = User.objects.create_user(username='HasNoName')
 
     def setUp(self):
+        cache.clear()
         # Создаем неавторизованный клиент
         self.guest_client = Client()
         self.authorized_client = Client()
@@ -36,6 +38,7 @@ class PostModelTest(TestCase):
         """URL-адрес использует соответствующий шаблон."""
         templates_url_names = {
             INDEX: 'posts/index.html',
+            reverse('posts:group_index'): 'posts/group_index.html',
             reverse('posts:group_list', kwargs={'slug': self.group.slug}):
                 'posts/group_list.html',
             reverse('posts:profile', kwargs={'username': self.author}):
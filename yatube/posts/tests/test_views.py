@@ -1,18 +1,21 @@
+import hashlib
 import shutil
 import tempfile
 
 from django.test import Client, TestCase, override_settings
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from django import forms
 
-from posts.models import Group, Post, User
+from posts.models import Comment, Group, Post, User
 
 INDEX = reverse('posts:index')
 GROUP_LIST = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
 POST_CREATE = reverse('posts:post_create')
 PAGE_IN_PAGINATOR = 10
+COMMENTS_ON_PAGE = 20
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -34,6 +37,8 @@ class PostsPagesTests(TestCase):
             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
             b'\x0A\x00\x3B'
         )
+        digest = hashlib.sha256(small_gif).hexdigest()
+        cls.image_name = f'posts/{digest[:2]}/{digest}.gif'
         cls.uploaded = SimpleUploadedFile(
             name='small.gif',
             content=small_gif,
@@ -84,7 +89,7 @@ class PostsPagesTests(TestCase):
         self.assertEqual(post_text_0, self.post.pk)
         self.assertEqual(post_author_0, self.author)
         self.assertEqual(post_group_0, self.group)
-        self.assertEqual(post_image_0,  'posts/small.gif')
+        self.assertEqual(post_image_0, self.image_name)
 
     def test_post_profile_show_correct_context(self):
         """Шаблон profile сформирован с правильным контекстом."""
@@ -97,7 +102,7 @@ class PostsPagesTests(TestCase):
         self.assertEqual(post_text_0, self.post.pk)
         self.assertEqual(post_author_0, self.author)
         self.assertEqual(post_group_0, self.group)
-        self.assertEqual(post_image_0,  'posts/small.gif')
+        self.assertEqual(post_image_0, self.image_name)
 
     def test_index_page_show_correct_context(self):
         """Шаблон index сформирован с правильным контекстом."""
@@ -110,7 +115,7 @@ class PostsPagesTests(TestCase):
         self.assertEqual(post_text_0, self.post.pk)
         self.assertEqual(post_author_0, self.author)
         self.assertEqual(post_group_0, self.group)
-        self.assertEqual(post_image_0,  'posts/small.gif')
+        self.assertEqual(post_image_0, self.image_name)
 
     def test_post_another_group(self):
         another_group = Group.objects.create(
@@ -144,6 +149,9 @@ class PaginatorViewsTest(TestCase):
                 text=f'text{post_temp}', author=cls.author, group=cls.group
             )
 
+    def setUp(self):
+        cache.clear()
+
     def test_first_page_contains_ten_records(self):
         templates_pages_names = {
             'posts/index.html': INDEX,
@@ -161,17 +169,77 @@ class PaginatorViewsTest(TestCase):
 
     def test_second_page_contains_three_records(self):
         templates_pages_names = {
-            'posts/index.html': INDEX + '?page=2',
+            'posts/index.html': INDEX,
             'posts/group_list.html':
-                reverse('posts:group_list',
-                        kwargs={'slug': self.group.slug}) + '?page=2',
+                reverse('posts:group_list', kwargs={'slug': self.group.slug}),
             'posts/profile.html':
-                reverse('posts:profile',
-                        kwargs={'username': self.author}) + '?page=2',
+                reverse('posts:profile', kwargs={'username': self.author}),
         }
         for template, reverse_name in templates_pages_names.items():
             with self.subTest(reverse_name=reverse_name):
-                response = self.client.get(reverse_name)
+                first_page = self.client.get(reverse_name).context['page_obj']
+                response = self.client.get(
+                    reverse_name, {'after': first_page.next_cursor}
+                )
                 self.assertEqual(len(
                     response.context['page_obj']), 3
                 )
+                self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_previous_page_returns_first_records(self):
+        first_page = self.client.get(INDEX).context['page_obj']
+        second_page = self.client.get(
+            INDEX, {'after': first_page.next_cursor}
+        ).context['page_obj']
+        response = self.client.get(
+            INDEX, {'before': second_page.previous_cursor}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), list(first_page)
+        )
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        response = self.client.get(INDEX, {'after': 'not-a-cursor'})
+        self.assertEqual(
+            len(response.context['page_obj']), PAGE_IN_PAGINATOR
+        )
+
+
+class CommentsPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='NoName')
+        cls.post = Post.objects.create(text='test_post', author=cls.author)
+        for number in range(COMMENTS_ON_PAGE + 5):
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'comment{number}'
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_detail_shows_newest_comments(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_ON_PAGE)
+        self.assertEqual(comments[0].text, f'comment{COMMENTS_ON_PAGE + 4}')
+        self.assertTrue(comments.has_next())
+
+    def test_older_comments_are_loaded_as_fragment(self):
+        first_page = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        ).context['comments']
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'after': first_page.next_cursor}
+        )
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [f'comment{number}' for number in range(4, -1, -1)]
+        )
+        self.assertNotContains(response, 'js-more-comments')
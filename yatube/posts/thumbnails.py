@@ -0,0 +1,101 @@
+import json
+
+from sorl.thumbnail import get_thumbnail
+
+from .cache import invalidate, post_scopes
+from .images import describe
+from .models import Post
+
+# Варианты превью: имя -> (ширины для srcset, высота/ширина или None,
+# если пропорции картинки сохраняются, опции sorl).
+THUMBNAIL_VARIANTS = {
+    'card': (
+        (480, 960, 1440), 339 / 960, {'crop': 'center', 'upscale': True}
+    ),
+    'detail': ((480, 960, 1920), None, {'upscale': False}),
+}
+# Форматы в порядке предпочтения: браузер берёт первый, который знает.
+THUMBNAIL_FORMATS = {'WEBP': 'image/webp', 'JPEG': 'image/jpeg'}
+# Ширина картинки для src - для браузеров без srcset.
+FALLBACK_WIDTH = 960
+
+
+def shared_thumbnails(post):
+    """Готовые превью другого поста с той же картинкой.
+
+    Имя картинки - хэш содержимого (posts.storage), так что совпадение
+    имени означает ту же картинку, и sorl не нужно даже открывать файл.
+    """
+    others = Post.objects.filter(image=post.image.name).exclude(
+        pk=post.pk
+    ).exclude(thumbnails='').values_list('thumbnails', flat=True)
+    for value in others[:1]:
+        thumbnails = json.loads(value)
+        if set(thumbnails) == set(THUMBNAIL_VARIANTS) and all(
+            'sources' in variant for variant in thumbnails.values()
+        ):
+            return thumbnails
+    return None
+
+
+def make_variant(image, widths, ratio, options):
+    """Превью одного варианта во всех ширинах и форматах.
+
+    {'url', 'width', 'height'} - запасная JPEG-картинка для src,
+    'sources' - {MIME-тип: [{'url', 'width', 'height'}, ...]} для srcset.
+    """
+    sources = {}
+    for image_format, mime_type in THUMBNAIL_FORMATS.items():
+        candidates = {}
+        for width in widths:
+            geometry = f'{width}x{round(width * ratio)}' if ratio else (
+                f'{width}'
+            )
+            thumbnail = get_thumbnail(
+                image, geometry, format=image_format, **options
+            )
+            # Без upscale маленький оригинал даёт одинаковые превью.
+            candidates[thumbnail.width] = {
+                'url': thumbnail.url,
+                'width': thumbnail.width,
+                'height': thumbnail.height,
+            }
+        sources[mime_type] = [
+            candidates[width] for width in sorted(candidates)
+        ]
+    fallback = min(
+        sources['image/jpeg'],
+        key=lambda source: abs(source['width'] - FALLBACK_WIDTH)
+    )
+    return {**fallback, 'sources': sources}
+
+
+def generate_thumbnails(post):
+    """Создаёт превью картинки поста и сохраняет их адреса и размеры.
+
+    Ленты берут готовые данные из Post.thumbnails и не обращаются
+    ни к файлу, ни к хранилищу ключей sorl.
+    """
+    thumbnails = {}
+    if post.image:
+        thumbnails = shared_thumbnails(post) or {}
+    if post.image and not thumbnails:
+        for name, (widths, ratio, options) in THUMBNAIL_VARIANTS.items():
+            thumbnails[name] = make_variant(post.image, widths, ratio, options)
+    post.thumbnails = json.dumps(thumbnails)
+    fields = {'thumbnails': post.thumbnails}
+    if post.image and not post.image_width:
+        # Картинка загружена в обход PostForm (админка, импорт) или
+        # до появления полей с размерами.
+        with post.image.open() as source:
+            width, height, placeholder = describe(source)
+        fields.update(
+            image_width=width,
+            image_height=height,
+            image_placeholder=placeholder
+        )
+    # update() не вызывает сигналы записи поста: текст и связи не менялись,
+    # достаточно сбросить страницы, где показана картинка.
+    Post.objects.filter(pk=post.pk).update(**fields)
+    invalidate(*post_scopes(post.author_id, {post.group_id}))
+    return thumbnails
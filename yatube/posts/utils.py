@@ -1,7 +1,122 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+from collections.abc import Sequence
 
+from django.core.exceptions import ValidationError
+from django.db.models import Q
 
-def my_paginator(request, post_list):
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+PAGE_SIZE = 10
+
+
+class KeysetPage(Sequence):
+    """Страница выдачи, построенная по курсору, без подсчёта всех записей."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Постраничная выдача по ключу (field, pk) вместо OFFSET.
+
+    Курсор - это закодированная пара значений последней (или первой)
+    записи страницы, поэтому глубина страницы не влияет на стоимость
+    запроса, а вставка новых записей не сдвигает соседние страницы.
+    """
+
+    def __init__(self, queryset, per_page=PAGE_SIZE, field='pub_date',
+                 descending=True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.descending = descending
+
+    def _model_field(self):
+        return self.queryset.model._meta.get_field(self.field)
+
+    def encode_cursor(self, obj):
+        value = self._model_field().value_to_string(obj)
+        raw = f'{value}|{obj.pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            value, _, pk = raw.decode().rpartition('|')
+            return self._model_field().to_python(value), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError,
+                ValidationError):
+            return None
+
+    def _ordering(self, reverse=False):
+        prefix = '-' if self.descending != reverse else ''
+        return prefix + self.field, prefix + 'pk'
+
+    def _seek(self, cursor, forward):
+        # Условие вида "value <= v AND (value < v OR pk < p)" использует
+        # индекс по полю сортировки, в отличие от чистого OR.
+        value, pk = cursor
+        op = 'lt' if self.descending == forward else 'gt'
+        return (
+            Q(**{f'{self.field}__{op}e': value})
+            & (Q(**{f'{self.field}__{op}': value}) | Q(**{f'pk__{op}': pk}))
+        )
+
+    def page_queryset(self, cursor=None, forward=True):
+        """Запрос одной страницы (с лишней записью для has_next)."""
+        queryset = self.queryset.order_by(*self._ordering(not forward))
+        if cursor is not None:
+            queryset = queryset.filter(self._seek(cursor, forward))
+        return queryset[:self.per_page + 1]
+
+    def _fetch(self, cursor, forward):
+        return list(self.page_queryset(cursor, forward))
+
+    def get_page(self, after=None, before=None):
+        before_cursor = self.decode_cursor(before)
+        if before_cursor is not None:
+            rows = self._fetch(before_cursor, forward=False)
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            after_cursor = self.decode_cursor(after)
+            rows = self._fetch(after_cursor, forward=True)
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = after_cursor is not None
+        if not rows:
+            return KeysetPage(rows)
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1]) if has_next else None,
+            previous_cursor=(
+                self.encode_cursor(rows[0]) if has_previous else None
+            ),
+        )
+
+
+def keyset_paginator(request, post_list, per_page=PAGE_SIZE):
+    paginator = KeysetPaginator(post_list, per_page)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
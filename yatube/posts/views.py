@@ -1,27 +1,66 @@
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
 
-from .models import Post, Group, Comment
+from .cache import (
+    GROUPS_SCOPE, INDEX_SCOPE, conditional_page, group_scope, page_cache,
+    post_scope, profile_scope
+)
+from core.jobs import enqueue
+from core.writes import serialized_write
+
+from . import timeline
+from .models import Post, Group, Comment, Follow
+from .export import FORMATS, export_rows
 from .forms import PostForm, CommentForm
-from .utils import my_paginator
+from .search import search_posts
+from .utils import KeysetPaginator, keyset_paginator
 
 User = get_user_model()
 
+COMMENTS_PER_PAGE = 20
+GROUPS_PER_PAGE = 50
+
 
+@page_cache(lambda: [INDEX_SCOPE])
+@conditional_page(lambda: [INDEX_SCOPE])
 def index(request):
-    post_list = Post.objects.all().order_by('-pub_date')
-    page_obj = my_paginator(request, post_list)
+    post_list = Post.objects.select_related('author', 'group')
+    page_obj = keyset_paginator(request, post_list)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@page_cache(lambda: [GROUPS_SCOPE])
+@conditional_page(lambda: [GROUPS_SCOPE])
+def group_index(request):
+    """Каталог групп: счётчики и последний пост хранятся в самой группе."""
+    paginator = KeysetPaginator(
+        Group.objects.defer('description'),
+        per_page=GROUPS_PER_PAGE,
+        field='title',
+        descending=False
+    )
+    page_obj = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+@page_cache(lambda slug: [group_scope(slug)])
+@conditional_page(lambda slug: [group_scope(slug)])
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = Post.objects.filter(group=group).order_by('-pub_date')
-    page_obj = my_paginator(request, post_list)
+    post_list = group.posts.select_related('author', 'group')
+    page_obj = keyset_paginator(request, post_list)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -29,43 +68,118 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@page_cache(lambda username: [profile_scope(username)])
+@conditional_page(lambda username: [profile_scope(username)])
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    post_list = Post.objects.all().filter(author__exact=user)
-    page_obj = my_paginator(request, post_list)
+    user = get_object_or_404(
+        User.objects.select_related('profile'), username=username
+    )
+    post_list = Post.objects.select_related('author', 'group').filter(
+        author=user
+    )
+    page_obj = keyset_paginator(request, post_list)
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=user
+    ).exists()
     context = {
         'author': user,
         'page_obj': page_obj,
-
+        'following': following,
     }
 
     return render(request, 'posts/profile.html', context)
 
 
+def export_response(request, post_list, filename):
+    data_format = request.GET.get('format', 'json')
+    if data_format not in FORMATS:
+        raise Http404('Неизвестный формат выгрузки')
+    serializer, content_type = FORMATS[data_format]
+    response = StreamingHttpResponse(
+        serializer(export_rows(post_list)),
+        content_type=f'{content_type}; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{data_format}"'
+    )
+    return response
+
+
+# Выгрузки нужны для резервных копий и запросов данных, а поток всех
+# постов дорог: группы - только персоналу, профиль - ещё и владельцу.
+@login_required
+def group_export(request, slug):
+    if not request.user.is_staff:
+        raise PermissionDenied
+    group = get_object_or_404(Group, slug=slug)
+    return export_response(request, group.posts.all(), f'group-{slug}')
+
+
+@login_required
+def profile_export(request, username):
+    if not request.user.is_staff and request.user.username != username:
+        raise PermissionDenied
+    user = get_object_or_404(User, username=username)
+    return export_response(
+        request, Post.objects.filter(author=user), f'profile-{username}'
+    )
+
+
+@page_cache(lambda post_id: [post_scope(post_id)])
+@conditional_page(lambda post_id: [post_scope(post_id)])
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id
+    )
     author = post.author
-    comments = post.comments.all()
     form = CommentForm()
     context = {
         'post': post,
         'author': author,
         'form': form,
-        'comments': comments,
+        'comments': comments_page(request, post.pk),
     }
 
     return render(request, 'posts/post_detail.html', context)
 
 
+def comments_page(request, post_id):
+    paginator = KeysetPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        per_page=COMMENTS_PER_PAGE,
+        field='created'
+    )
+    return paginator.get_page(after=request.GET.get('after'))
+
+
+@conditional_page(lambda post_id: [post_scope(post_id)])
+def post_comments(request, post_id):
+    """Следующая порция комментариев в виде HTML-фрагмента."""
+    context = {
+        'post_id': post_id,
+        'comments': comments_page(request, post_id),
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    context = {
+        'query': query,
+        'results': search_posts(query) if query else [],
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     context = {
         'form': form,
     }
     if form.is_valid():
         form.instance.author = request.user
-        form.save()
+        serialized_write(form.save)
         return redirect('posts:profile', request.user.username)
     return render(request, 'posts/create_post.html', context)
 
@@ -86,7 +200,7 @@ def post_edit(request, post_id):
         'is_edit': True,
     }
     if form.is_valid():
-        form.save()
+        serialized_write(form.save)
         return redirect('posts:post_detail', post_id=post_id)
     return render(request, 'posts/create_post.html', context)
 
@@ -98,5 +212,46 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        serialized_write(comment.save)
     return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+def follow_index(request):
+    entries = request.user.timeline.select_related(
+        'post__author', 'post__group'
+    )
+    page_obj = keyset_paginator(request, entries)
+    page_obj.object_list = [entry.post for entry in page_obj]
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+def follow(user, author):
+    _, created = Follow.objects.get_or_create(user=user, author=author)
+    if created:
+        enqueue(
+            'posts.backfill_timeline', user_id=user.pk, author_id=author.pk
+        )
+
+
+def unfollow(user, author):
+    Follow.objects.filter(user=user, author=author).delete()
+    timeline.remove(user.pk, author.pk)
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        serialized_write(follow, request.user, author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    serialized_write(unfollow, request.user, author)
+    return redirect('posts:profile', username=username)
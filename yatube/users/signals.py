@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Profile, User
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, using, raw=False, **kwargs):
+    # Счётчики в posts.counters только обновляют профиль: создаётся он
+    # вместе с пользователем (существующим - миграцией и rebuild_counters).
+    if created and not raw:
+        Profile.objects.using(using).get_or_create(user=instance)
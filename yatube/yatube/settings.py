@@ -20,6 +20,8 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Загрузки больше 1 МБ пишутся во временный файл, а не в память.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
 
 
 # Quick-start development settings - unsuitable for production
@@ -46,6 +48,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -56,7 +59,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'posts.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -91,13 +97,35 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# core.backends.sqlite3 - SQLite с WAL и BEGIN IMMEDIATE для нескольких
+# процессов; PRAGMA можно переопределить в OPTIONS['pragmas'].
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение переживает запрос: PRAGMA и кэш страниц SQLite
+        # не пересоздаются на каждый запрос.
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Чтение в веб-запросах идёт в реплики (core.db_routers), запись -
+# в default. Для локальной проверки реплику заменяет копия файла БД,
+# которую обновляет команда sync_replicas:
+#   DB_REPLICA_PATH=/tmp/replica.sqlite3 python manage.py sync_replicas
+DATABASE_ROUTERS = ['core.db_routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+if os.environ.get('DB_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': os.environ['DB_REPLICA_PATH'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica')
+
+# Сколько секунд после записи пользователь читает из основной БД.
+REPLICA_LAG_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -139,6 +167,16 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+# collectstatic пишет сюда файлы с хешем в имени, манифест
+# и сжатые копии .gz/.br (core.storage).
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+# Отдавать STATIC_ROOT самим Django (core.views.static_file), если перед
+# приложением нет веб-сервера со своим gzip_static.
+SERVE_STATIC = os.environ.get('SERVE_STATIC', '1') == '1'
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'users:logout'
@@ -155,4 +193,14 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
-}
\ No newline at end of file
+}
+
+# Фоновые задачи (core.jobs): при True выполняются сразу в запросе,
+# иначе пишутся в БД и выполняются командой run_jobs.
+JOBS_SYNC = False
+
+# Заголовок Server-Timing с разбивкой времени запроса (core.middleware).
+METRICS_DEBUG_HEADER = DEBUG
+# Адреса сборщиков метрик, которым /metrics доступен без входа
+# (сравнивается REMOTE_ADDR); персоналу - всегда.
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']